@@ -1,3 +1,62 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
 
-# Create your tests here.
+from product.tests import QueryBudgetTestCase
+
+
+class AccountEndpointsQueryBudgetTest(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            "buyer@example.com", "buyer@example.com", "old-password"
+        )
+
+    def grow(self, size):
+        for index in range(User.objects.count(), size):
+            User.objects.create(username=f"user{index}", email=f"user{index}@x.com")
+
+    def test_budgets_stay_flat(self):
+        for size in self.sizes:
+            self.grow(size)
+            self.client.force_authenticate(self.user)
+            with self.subTest("userinfo", size=size):
+                self.assertQueryBudget(0, lambda: self.client.get("/api/userinfo/"))
+            passwords = {
+                "current_password": "old-password",
+                "new_password": "old-password",
+                "confirm_password": "old-password",
+            }
+            with self.subTest("change_password", size=size):
+                self.assertQueryBudget(
+                    1, lambda: self.client.post("/api/change_password/", passwords)
+                )
+            self.client.force_authenticate(None)
+
+            signup = {
+                "first_name": "New",
+                "last_name": "Buyer",
+                "email": f"new{size}@example.com",
+                "password": "secret-password",
+                "confirm_password": "secret-password",
+            }
+            with self.subTest("register", size=size):
+                self.assertQueryBudget(
+                    3, lambda: self.client.post("/api/register/", signup)
+                )
+            with self.subTest("forgot_password", size=size):
+                self.assertQueryBudget(
+                    3,
+                    lambda: self.client.post(
+                        "/api/forgot_password/", {"email": self.user.email}
+                    ),
+                )
+            self.user.profile.refresh_from_db()
+            token = self.user.profile.reset_password_token
+            with self.subTest("verify", size=size):
+                self.assertQueryBudget(
+                    1, lambda: self.client.get(f"/api/password/verify/{token}/")
+                )
+            reset = {"password": "old-password", "confirm_password": "old-password"}
+            with self.subTest("reset", size=size):
+                self.assertQueryBudget(
+                    3, lambda: self.client.post(f"/api/password/reset/{token}/", reset)
+                )
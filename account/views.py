@@ -8,7 +8,8 @@ from rest_framework import status
 from django.conf import settings
 from .serializers import SignUpSerialzer, UserSerialzer
 from rest_framework.permissions import IsAuthenticated
-from datetime import datetime, timedelta
+from datetime import timedelta
+from django.utils import timezone
 import secrets
 from django.core.mail import send_mail
 
@@ -61,7 +62,7 @@ def forgot_password(request):
         return Response({"error": "This Email not Exist"}, status=400)
     user = get_object_or_404(User, email=email)
     token = str(secrets.randbelow(900000) + 100000)
-    expire_date = datetime.now() + timedelta(minutes=10)
+    expire_date = timezone.now() + timedelta(minutes=10)
     user.profile.reset_password_token = token
     user.profile.reset_password_expire = expire_date
     user.profile.save()
@@ -79,8 +80,10 @@ def forgot_password(request):
 
 @api_view(["GET"])
 def verify_reset_token(request, token):
-    user = get_object_or_404(User, profile__reset_password_token=token)
-    if user.profile.reset_password_expire.replace(tzinfo=None) < datetime.now():
+    user = get_object_or_404(
+        User.objects.select_related("profile"), profile__reset_password_token=token
+    )
+    if user.profile.reset_password_expire < timezone.now():
         return Response({"error": "Token is expired"}, status=400)
 
     return Response({"message": "Token is valid", "username": user.username})
@@ -88,9 +91,11 @@ def verify_reset_token(request, token):
 
 @api_view(["POST"])
 def reset_password(request, token):
-    user = get_object_or_404(User, profile__reset_password_token=token)
+    user = get_object_or_404(
+        User.objects.select_related("profile"), profile__reset_password_token=token
+    )
 
-    if user.profile.reset_password_expire.replace(tzinfo=None) < datetime.now():
+    if user.profile.reset_password_expire < timezone.now():
         return Response({"error": "Token is expired"}, status=400)
 
     password = request.data.get("password")
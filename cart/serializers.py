@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Cart, CartItem
+from product.fast_serializers import format_datetime, product_to_dict, variant_to_dict
 from product.serializers import ProductSerializer, ProductVariantSerializer
 from offers.services import OfferService
 
@@ -36,14 +37,52 @@ class CartSerializer(serializers.ModelSerializer):
             "offers",
         ]
 
+    def pricing(self, obj):
+        # الأربع fields من حسبة واحدة للكارت
+        if getattr(self, "_priced_cart", None) is not obj:
+            self._priced_cart = obj
+            self._pricing = OfferService().calculate(obj)
+        return self._pricing
+
     def get_subtotal(self, obj):
-        return OfferService().calculate(obj)["subtotal"]
+        return self.pricing(obj)["subtotal"]
 
     def get_discount(self, obj):
-        return OfferService().calculate(obj)["discount"]
+        return self.pricing(obj)["discount"]
 
     def get_total(self, obj):
-        return OfferService().calculate(obj)["total"]
+        return self.pricing(obj)["total"]
 
     def get_offers(self, obj):
-        return OfferService().calculate(obj)["offers"]
+        return self.pricing(obj)["offers"]
+
+
+def serialize_cart(cart):
+    """
+    نفس CartSerializer(cart).data بس الـ items والمنتجات بتتحمل مرة واحدة
+    (prefetch) والأسعار بتتحسب مرة واحدة بدل 4 من نفس الأصناف.
+    """
+    items = list(
+        cart.items.select_related("variant__product__category").prefetch_related(
+            "variant__product__images", "variant__product__variants"
+        )
+    )
+    pricing = OfferService().calculate(cart, items)
+    return {
+        "id": cart.id,
+        "user": cart.user_id,
+        "created_at": format_datetime(cart.created_at),
+        "subtotal": pricing["subtotal"],
+        "discount": pricing["discount"],
+        "total": pricing["total"],
+        "items": [
+            {
+                "id": item.id,
+                "product": product_to_dict(item.variant.product),
+                "variant": variant_to_dict(item.variant),
+                "quantity": item.quantity,
+            }
+            for item in items
+        ],
+        "offers": pricing["offers"],
+    }
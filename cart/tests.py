@@ -1,3 +1,182 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from offers.models import Offer
+from offers.rules import table as offer_rules
+from order.models import Order, ShippingSetting
+from payment.models import PaymentTransaction
+from product.models import Product, ProductImage, ProductVariant
+from product.tests import QueryBudgetTestCase, create_product
+from .models import Cart, CartItem
+from .serializers import CartSerializer, serialize_cart
+
+
+class SerializeCartTest(TestCase):
+    def test_same_json_as_cart_serializer(self):
+        product = Product.objects.create(name="Oud", slug="oud", brand="Lattafa")
+        ProductImage.objects.create(product=product, image="product_images/oud.jpg")
+        small = ProductVariant.objects.create(
+            product=product, size_ml=10, price=Decimal("150.00"), stock=9
+        )
+        large = ProductVariant.objects.create(
+            product=product,
+            size_ml=100,
+            price=Decimal("900.00"),
+            discount=Decimal("90.00"),
+            stock=2,
+        )
+        Offer.objects.create(
+            title="3 x 10ml",
+            size_ml=10,
+            required_quantity=3,
+            original_price=Decimal("450.00"),
+            offer_price=Decimal("400.00"),
+            image="offers/specials/x.jpg",
+        )
+        cart = Cart.objects.create(user=User.objects.create(username="buyer"))
+        CartItem.objects.create(cart=cart, variant=small, quantity=4)
+        CartItem.objects.create(cart=cart, variant=large, quantity=1)
+
+        render = JSONRenderer().render
+        self.assertEqual(
+            render(serialize_cart(cart)), render(CartSerializer(cart).data)
+        )
+
+
+class CartMutationResponseTest(TestCase):
+    def test_mutations_return_priced_cart(self):
+        product = Product.objects.create(name="Oud", slug="oud", brand="Lattafa")
+        variant = ProductVariant.objects.create(
+            product=product, size_ml=10, price=Decimal("150.00"), stock=9
+        )
+        Offer.objects.create(
+            title="2 x 10ml",
+            size_ml=10,
+            required_quantity=2,
+            original_price=Decimal("300.00"),
+            offer_price=Decimal("250.00"),
+            image="offers/specials/x.jpg",
+        )
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username="buyer"))
+
+        added = client.post("/api/cart/add/", {"variant_id": variant.id, "quantity": 2})
+        self.assertEqual(added.data["cart"], client.get("/api/cart/").data)
+        self.assertEqual(added.data["cart"]["total"], Decimal("250.00"))
+
+        item_id = added.data["cart"]["items"][0]["id"]
+        updated = client.patch(f"/api/cart/item/{item_id}/update/", {"quantity": 3})
+        self.assertEqual(updated.data["cart"]["total"], Decimal("400.00"))
+
+        deleted = client.delete(f"/api/cart/item/{item_id}/delete/")
+        self.assertEqual(deleted.data["cart"]["items"], [])
+        self.assertEqual(deleted.data["cart"]["total"], Decimal("0.00"))
+
+
+class CartEndpointsQueryBudgetTest(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="buyer")
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        ShippingSetting.objects.create(governorate="Cairo", cost=Decimal("60.00"))
+        for size_ml in (30, 10):
+            Offer.objects.create(
+                title=f"2 x {size_ml}ml",
+                size_ml=size_ml,
+                required_quantity=2,
+                original_price=Decimal("600.00"),
+                offer_price=Decimal("500.00"),
+                image="offers/specials/x.jpg",
+            )
+        # جدول العروض بيتبني مرة لكل worker، والـ budget للحالة العادية بعدها
+        offer_rules.rules()
+
+    def grow(self, size):
+        # الكارت بيكبر بمنتجات جديدة بس بنفس الأحجام
+        for index in range(Product.objects.count(), size):
+            for variant in create_product(index).variants.all():
+                CartItem.objects.create(cart=self.cart, variant=variant, quantity=1)
+        self.variant = ProductVariant.objects.order_by("id").first()
+
+    def test_cart_budget_stays_flat(self):
+        # كارت + أصناف + صور + variants، والعروض من الذاكرة
+        self.assertBudgets(lambda: {"/api/cart/": 4})
+
+    def test_mutation_budgets_stay_flat(self):
+        for size in self.sizes:
+            self.grow(size)
+            item = self.cart.items.order_by("-id").first()
+            with self.subTest(size=size):
+                # كل تعديل بيرجع الكارت كله (أصناف + صور + variants)
+                self.assertQueryBudget(
+                    7,
+                    lambda: self.client.post(
+                        "/api/cart/add/", {"variant_id": self.variant.id}
+                    ),
+                )
+                self.assertQueryBudget(
+                    6,
+                    lambda: self.client.patch(
+                        f"/api/cart/item/{item.id}/update/", {"quantity": 2}
+                    ),
+                )
+                self.assertQueryBudget(
+                    6, lambda: self.client.delete(f"/api/cart/item/{item.id}/delete/")
+                )
 
-# Create your tests here.
+    @mock.patch("cart.views.create_cashier_payment")
+    def test_checkout_budgets_stay_flat(self, create_payment):
+        other = User.objects.create(username="other")
+        Cart.objects.create(user=other)
+        for size in self.sizes:
+            self.grow(size)
+            reference = f"ref-{size}"
+            create_payment.return_value = {"reference": reference, "redirect_url": "/"}
+            # الأوردر بيتعمل من كارت فيه أحدث صنفين مهما الكتالوج كبر، فكل
+            # مرة بيعملوا صفوف DailySales جديدة
+            newest, second = ProductVariant.objects.order_by("-id")[:2]
+            self.client.force_authenticate(other)
+            with self.subTest("buy_now", size=size):
+                self.assertQueryBudget(
+                    7,
+                    lambda: self.client.post(
+                        "/api/cart/buy_now/",
+                        {"variant_id": newest.id, "quantity": 2},
+                    ),
+                )
+            CartItem.objects.create(cart=other.cart, variant=second, quantity=1)
+            checkout = {
+                "governorate": "Cairo",
+                "city": "Nasr City",
+                "street": "Abbas El Akkad",
+                "customer_phone": "01000000000",
+                "method": "card",
+            }
+            with self.subTest("pay", size=size):
+                self.assertQueryBudget(
+                    4, lambda: self.client.post("/api/payment/pay/", checkout)
+                )
+            webhook = {"payload": {"reference": reference, "status": "SUCCESS"}}
+            with self.subTest("webhook", size=size):
+                self.assertQueryBudget(
+                    33,
+                    lambda: self.client.post(
+                        "/api/payment/webhook/", webhook, format="json"
+                    ),
+                )
+            self.assertTrue(Order.objects.filter(opay_reference=reference).exists())
+            self.assertFalse(PaymentTransaction.objects.exists())
+            with self.subTest("get-order", size=size):
+                self.assertQueryBudget(
+                    2,
+                    lambda: self.client.get(
+                        f"/api/payment/get-order/?reference={reference}"
+                    ),
+                )
+            self.client.force_authenticate(self.user)
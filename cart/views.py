@@ -12,8 +12,9 @@ from order.models import (
     ShippingSetting,
     PaymentStatus,
 )  # <=== أضفنا PaymentStatus هنا
-from .serializers import CartSerializer
+from .serializers import serialize_cart
 from product.models import ProductVariant
+from product.sales import record_sales
 from payment.utils import create_cashier_payment
 from django.contrib.sessions.models import Session
 from django.contrib.auth import get_user_model
@@ -40,8 +41,7 @@ def get_or_create_cart(request):
 @api_view(["GET"])
 def get_cart(request):
     cart = get_or_create_cart(request)
-    serializer = CartSerializer(cart)
-    return Response(serializer.data)
+    return Response(serialize_cart(cart))
 
 
 @api_view(["POST"])
@@ -73,7 +73,10 @@ def add_to_cart(request):
     cart_item.save()
 
     return Response(
-        {"message": "Variant added to cart successfully."},
+        {
+            "message": "Variant added to cart successfully.",
+            "cart": serialize_cart(cart),
+        },
         status=status.HTTP_200_OK,
     )
 
@@ -81,7 +84,9 @@ def add_to_cart(request):
 @api_view(["PATCH"])
 def update_cart_item_quantity(request, item_id):
     cart = get_or_create_cart(request)
-    item = get_object_or_404(CartItem, id=item_id, cart=cart)
+    item = get_object_or_404(
+        CartItem.objects.select_related("variant"), id=item_id, cart=cart
+    )
 
     quantity = int(request.data.get("quantity", 1))
     if quantity < 1:
@@ -93,7 +98,13 @@ def update_cart_item_quantity(request, item_id):
 
     item.quantity = quantity
     item.save()
-    return Response({"message": "Quantity updated.", "quantity": item.quantity})
+    return Response(
+        {
+            "message": "Quantity updated.",
+            "quantity": item.quantity,
+            "cart": serialize_cart(cart),
+        }
+    )
 
 
 @api_view(["DELETE"])
@@ -101,7 +112,9 @@ def delete_cart_item(request, item_id):
     cart = get_or_create_cart(request)
     item = get_object_or_404(CartItem, id=item_id, cart=cart)
     item.delete()
-    return Response({"message": "Item deleted from cart."})
+    return Response(
+        {"message": "Item deleted from cart.", "cart": serialize_cart(cart)}
+    )
 
 
 @api_view(["POST"])
@@ -134,7 +147,7 @@ def buy_now(request):
 
     CartItem.objects.create(cart=cart, variant=variant, quantity=quantity)
 
-    # ✅ نرجع استجابة بسيطة — المستخدم هيتحول بعدها لصفحة Checkout
+    # ✅ المستخدم هيتحول بعدها لصفحة Checkout، والكارت راجع معانا عشان ما تطلبوش تاني
     return Response(
         {
             "message": "Product added successfully for checkout.",
@@ -142,6 +155,7 @@ def buy_now(request):
             "quantity": quantity,
             "cart_id": cart.id,
             "is_guest": not request.user.is_authenticated,
+            "cart": serialize_cart(cart),
         },
         status=status.HTTP_200_OK,
     )
@@ -151,12 +165,13 @@ def buy_now(request):
 def initiate_payment(request):
     print("🔔 Data received from Checkout Form:", request.data, file=sys.stderr)
     cart = get_or_create_cart(request)
-    cart_items = cart.items.all()
+    # الأصناف مرة واحدة للتسعير ولعدد القطع
+    cart_items = list(cart.items.select_related("variant__product"))
 
-    if not cart_items.exists():
+    if not cart_items:
         return Response({"error": "Cart is empty."}, status=400)
 
-    offer_result = OfferService().calculate(cart)
+    offer_result = OfferService().calculate(cart, cart_items)
     subtotal = offer_result["total"]
 
     shipping_setting = (
@@ -340,7 +355,7 @@ def opay_webhook(request):
     total_amount = Decimal("0.0")
     products_to_update = []
     for item in cart.items.select_related("variant").all():
-        price = Decimal(item.variant.price) - Decimal(item.variant.discount or 0)
+        price = item.variant.final_price
         total_amount += price * item.quantity
         OrderItem.objects.create(
             order=order,
@@ -365,6 +380,8 @@ def opay_webhook(request):
     for variant in products_to_update:
         variant.save()
 
+    record_sales(order)
+
     # 4. حذف سجل المعاملة بعد نجاح إنشاء الأوردر
     transaction.delete()
 
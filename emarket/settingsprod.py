@@ -57,6 +57,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "product.apps.ProductConfig",
     "account.apps.AccountConfig",
@@ -228,6 +229,38 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# البحث: "memory" فهرس في الذاكرة لكل worker، "database" full-text/icontains
+SEARCH_BACKEND = "memory"
+# كل قد إيه (بالثواني) الـ worker يعيد بناء الفهرس عشان يلحق تعديلات الـ workers التانية
+SEARCH_INDEX_TTL = 300
+# حدود الأسعار لـ facet السعر (?facets=1)
+PRICE_FACET_BUCKETS = (0, 500, 1000, 2000, 5000)
+
+# كاش الـ responses العامة (الأقسام، العروض، الشحن...) متربوط برقم نسخة الكتالوج.
+# لازم يبقى مشترك بين الـ workers (file/redis) عشان رقم النسخة يتشاف عند الكل
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache", "catalog"),
+    },
+}
+CATALOG_CACHE_ALIAS = "catalog"
+CATALOG_CACHE_TIMEOUT = 60 * 60
+# الـ version اللي الـ catalog feed بيرجعه متأخر بالمدة دي عن وقت بدايته، عشان
+# التعديلات اللي اتكتب وقتها قبل الـ feed واتعملها commit بعده ما تضيعش.
+# لازم تكون أطول من أطول transaction بتعدل منتجات
+CATALOG_FEED_LAG = timedelta(minutes=5)
+
+# نسخ الصور المتصغرة (WebP/JPEG) اللي بتتعمل مع كل رفع، والأصل بيتصغر لحد أقصى
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1024)
+IMAGE_MAX_DIMENSION = 2048
+IMAGE_QUALITY = 82
+# المقاسات المسموحة لـ /media/resized/<w>x<h>/ (بانرات العروض، التقييمات، الأقسام)
+IMAGE_RESIZE_SIZES = {(1920, 600), (1200, 400), (800, 800), (400, 400), (200, 200)}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -24,10 +24,16 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 from django.conf import settings
+from product.resize import resized_image
 import os
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path(
+        "media/resized/<int:width>x<int:height>/<path:path>",
+        resized_image,
+        name="resized_image",
+    ),
     path("api/", include("product.urls")),
     path("api/", include("account.urls")),
     path("api/", include("order.urls")),
@@ -7,10 +7,28 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import connections
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "emarket.settings")
 
 application = get_wsgi_application()
+
+logger = logging.getLogger(__name__)
+
+# نبني فهرس البحث مع بداية الـ worker بدل أول request
+try:
+    from django.conf import settings
+    from product.search_index import index
+
+    if settings.SEARCH_BACKEND == "memory":
+        index.build()
+except Exception:  # الفهرس هيتبني مع أول بحث
+    logger.warning("Search index warm-up skipped", exc_info=True)
+finally:
+    # مع gunicorn --preload الـ workers بيتعملوا fork من هنا، وما ينفعش
+    # يتشاركوا نفس الـ connection
+    connections.close_all()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("offers", "0003_offer_priority"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="offer",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("offers", "0004_offer_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="offer",
+            index=models.Index(
+                condition=models.Q(("active", True)),
+                fields=["size_ml", "-required_quantity"],
+                name="offer_active_size_idx",
+            ),
+        ),
+    ]
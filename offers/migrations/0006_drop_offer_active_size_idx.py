@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("offers", "0005_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="offer",
+            name="offer_active_size_idx",
+        ),
+    ]
@@ -31,5 +31,7 @@ class Offer(models.Model):
 
     end_date = models.DateField(null=True, blank=True)
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return self.title
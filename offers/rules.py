@@ -0,0 +1,111 @@
+"""
+جدول العروض متجمع في الذاكرة: كل worker بيقرا العروض الشغالة مرة واحدة
+ويحولها لـ rules مترتبة لكل حجم، فتسعير الكارت ما بيكلمش الداتابيز خالص
+عشان العروض.
+
+أي save أو delete لـ Offer بيغير رقم نسخة في الكاش المشترك (نفس كاش
+الكتالوج)، وكل worker بيقارن النسخة دي بنسخة الجدول اللي عنده قبل ما
+يستخدمه، فالتعديل بيوصل لكل الـ workers من أول request بعده.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from product.cache import get_cache
+from .models import Offer
+
+VERSION_KEY = "offers:rules-version"
+
+OfferRule = namedtuple(
+    "OfferRule",
+    (
+        "id",
+        "title",
+        "size_ml",
+        "required_quantity",
+        "gift_quantity",
+        "original_price",
+        "offer_price",
+        "priority",
+        "start_date",
+        "end_date",
+    ),
+)
+
+
+def _active_on(rule, day):
+    return (rule.start_date is None or rule.start_date <= day) and (
+        rule.end_date is None or day <= rule.end_date
+    )
+
+
+def rules_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # زي catalog_version: لو الكاش اتمسح النسخة الجديدة عمرها ما تساوي القديمة
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_rules_version(**kwargs):
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def compile_rules():
+    """{size_ml: (OfferRule, ...)} للعروض الشغالة، بالأولوية وبعدها الأكبر كمية."""
+    rules = {}
+    offers = Offer.objects.filter(active=True).order_by(
+        "size_ml", "priority", "-required_quantity", "id"
+    )
+    for row in offers.values_list(*OfferRule._fields):
+        rule = OfferRule(*row)
+        rules.setdefault(rule.size_ml, []).append(rule)
+    return MappingProxyType({size: tuple(items) for size, items in rules.items()})
+
+
+class RuleTable:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._rules = MappingProxyType({})
+
+    def rules(self):
+        version = rules_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    # النسخة اتقرت قبل العروض، فلو عرض اتعدل أثناء البناء
+                    # الـ request الجاي هيبني تاني
+                    self._rules = compile_rules()
+                    self._version = version
+        return self._rules
+
+    def for_size(self, size_ml, day=None):
+        """العروض اللي شغالة النهارده (أو day) للحجم ده بترتيب تطبيقها."""
+        day = day or timezone.localdate()
+        return [rule for rule in self.rules().get(size_ml, ()) if _active_on(rule, day)]
+
+
+table = RuleTable()
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def invalidate_rules(sender, **kwargs):
+    bump_rules_version()
+    # worker تاني ممكن يبني الجدول قبل الـ commit فيقرا العروض القديمة بالنسخة
+    # الجديدة، فبنغيرها تاني بعد الـ commit
+    transaction.on_commit(bump_rules_version)
@@ -1,15 +1,22 @@
 from decimal import Decimal
-from .models import Offer
 
+from django.utils import timezone
+
+from .rules import table as offer_rules
 
-class OfferService:
 
-    def calculate(self, cart):
+class OfferService:
 
-        items = cart.items.select_related(
-            "variant",
-            "variant__product",
-        )
+    def calculate(self, cart, items=None):
+        """
+        items: أصناف الكارت لو اتحملت قبل كده بالـ variant والمنتج، عشان
+        التسعير ما يقراش الأصناف تاني (serialize_cart).
+        """
+        if items is None:
+            items = cart.items.select_related(
+                "variant",
+                "variant__product",
+            )
 
         subtotal = Decimal("0")
         total = Decimal("0")
@@ -25,7 +32,7 @@ class OfferService:
 
             variant = item.variant
 
-            item_price = Decimal(variant.price) - Decimal(variant.discount or 0)
+            item_price = variant.final_price
 
             subtotal += item_price * item.quantity
 
@@ -45,15 +52,14 @@ class OfferService:
         # Apply Offers
         # ===========================
         applied_offers = []
+        today = timezone.localdate()
 
         for size, products in grouped.items():
 
             quantity = sum(p["item"].quantity for p in products)
 
-            offers = Offer.objects.filter(
-                active=True,
-                size_ml=size,
-            ).order_by("-required_quantity")
+            # من جدول العروض اللي في الذاكرة، من غير queries
+            offers = offer_rules.for_size(size, today)
 
             remaining = quantity
 
@@ -1,3 +1,104 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from cart.models import Cart, CartItem
+from product.cache import get_cache
+from product.models import Product, ProductVariant
+from product.tests import QueryBudgetTestCase
+from .models import Offer
+from .rules import RuleTable
+from .services import OfferService
+
+
+def create_offer(**kwargs):
+    kwargs.setdefault("title", f"{kwargs['required_quantity']} x 10ml")
+    kwargs.setdefault("size_ml", 10)
+    kwargs.setdefault("original_price", Decimal("150.00") * kwargs["required_quantity"])
+    kwargs.setdefault("image", "offers/specials/x.jpg")
+    return Offer.objects.create(**kwargs)
+
+
+class OfferRuleTableTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.table = RuleTable()
+
+    def test_date_windows_and_priority(self):
+        today = date(2026, 10, 18)
+        big = create_offer(required_quantity=3, offer_price=Decimal("400.00"))
+        preferred = create_offer(
+            required_quantity=2, offer_price=Decimal("250.00"), priority=0
+        )
+        create_offer(
+            required_quantity=4,
+            offer_price=Decimal("500.00"),
+            end_date=today - timedelta(days=1),
+        )
+        upcoming = create_offer(
+            required_quantity=5,
+            offer_price=Decimal("600.00"),
+            start_date=today + timedelta(days=1),
+        )
+        create_offer(required_quantity=6, offer_price=Decimal("700.00"), active=False)
+
+        def ids(day):
+            return [rule.id for rule in self.table.for_size(10, day)]
+
+        # الأولوية الأول، وبعدها الأكبر كمية
+        self.assertEqual(ids(today), [preferred.id, big.id])
+        self.assertEqual(
+            ids(today + timedelta(days=1)), [preferred.id, upcoming.id, big.id]
+        )
+        self.assertEqual(self.table.for_size(30, today), [])
+
+    def test_offer_changes_reach_other_workers(self):
+        offer = create_offer(required_quantity=2, offer_price=Decimal("250.00"))
+        other_worker = RuleTable()
+        self.assertEqual(len(self.table.for_size(10)), 1)
+        self.assertEqual(len(other_worker.for_size(10)), 1)
+
+        # التعديل من worker واحد بيغير النسخة في الكاش المشترك
+        offer.active = False
+        offer.save()
+        self.assertEqual(other_worker.for_size(10), [])
+        with self.assertNumQueries(0):
+            other_worker.for_size(10)
+
+        offer.delete()
+        create_offer(required_quantity=3, offer_price=Decimal("400.00"))
+        self.assertEqual(len(other_worker.for_size(10)), 1)
+
+    def test_pricing_does_not_query_offers(self):
+        create_offer(required_quantity=2, offer_price=Decimal("250.00"))
+        product = Product.objects.create(name="Oud", slug="oud", brand="Lattafa")
+        variant = ProductVariant.objects.create(
+            product=product, size_ml=10, price=Decimal("150.00"), stock=9
+        )
+        cart = Cart.objects.create(user=User.objects.create(username="buyer"))
+        CartItem.objects.create(cart=cart, variant=variant, quantity=3)
+        items = list(cart.items.select_related("variant__product"))
+
+        OfferService().calculate(cart, items)
+        with self.assertNumQueries(0):
+            pricing = OfferService().calculate(cart, items)
+        self.assertEqual(pricing["total"], Decimal("400.00"))
+        self.assertEqual(pricing["offers"][0]["times"], 1)
+
+
+class OfferEndpointsQueryBudgetTest(QueryBudgetTestCase):
+    def grow(self, size):
+        for index in range(Offer.objects.count(), size):
+            Offer.objects.create(
+                title=f"{index + 2} x 10ml",
+                size_ml=10,
+                required_quantity=index + 2,
+                original_price=Decimal("150.00") * (index + 2),
+                offer_price=Decimal("120.00") * (index + 2),
+                image=f"offers/specials/{index}.jpg",
+            )
+
+    def test_budgets_stay_flat(self):
+        self.assertBudgets(lambda: {"/api/offers/": 1, "/api/offers/featured/": 1})
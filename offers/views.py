@@ -3,9 +3,12 @@ from rest_framework.response import Response
 
 from .models import Offer
 from .serializers import OfferSerializer
+from product.cache import cached_response, catalog_conditional
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def get_offers(request):
 
     offers = Offer.objects.filter(active=True).order_by(
@@ -21,7 +24,9 @@ def get_offers(request):
     return Response(serializer.data)
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def featured_offers(request):
     offers = Offer.objects.filter(active=True).order_by(
         "priority", "size_ml", "required_quantity"
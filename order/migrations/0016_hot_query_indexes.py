@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0015_order_shipping_cost"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="order",
+            name="opay_reference",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=150, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at"], name="order_user_created_idx"
+            ),
+        ),
+    ]
@@ -34,7 +34,9 @@ class Order(models.Model):
     floor_number = models.CharField(max_length=255, blank=True, null=True)
     apartment_number = models.CharField(max_length=255, blank=True, null=True)
     landmark = models.CharField(max_length=255, blank=True, null=True)
-    opay_reference = models.CharField(max_length=150, null=True, blank=True)
+    opay_reference = models.CharField(
+        max_length=150, null=True, blank=True, db_index=True
+    )
     # order details
     total_amount = models.IntegerField(default=0)
     payment_status = models.CharField(
@@ -46,6 +48,12 @@ class Order(models.Model):
     shipping_cost = models.DecimalField(max_digits=6, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # أوردرات اليوزر، الأحدث الأول
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return str(self.id)
 
@@ -1,3 +1,79 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+
+from product.models import Product
+from product.tests import QueryBudgetTestCase, create_product
+from .models import Order, OrderItem, ShippingSetting
+
+
+class OrderEndpointsQueryBudgetTest(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="buyer", is_staff=True)
+        self.client.force_authenticate(self.user)
+
+    def grow(self, size):
+        # أوردر جديد فيه كل المنتجات لحد دلوقتي، وطريقة شحن لكل منتج
+        for index in range(Product.objects.count(), size):
+            create_product(index)
+            ShippingSetting.objects.create(governorate=f"Governorate {index}")
+        self.order = Order.objects.create(
+            user=self.user,
+            customer_phone="01000000000",
+            governorate="Cairo",
+            city="Nasr City",
+            street="Abbas El Akkad",
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=self.order,
+                product=product,
+                name=product.name,
+                price=Decimal("300.00"),
+            )
+            for product in Product.objects.all()
+        )
+
+    def test_read_budgets_stay_flat(self):
+        self.assertBudgets(
+            lambda: {
+                "/api/orders/": 2,
+                f"/api/orders/{self.order.id}/": 2,
+                "/api/shipping/": 1,
+            }
+        )
+
+    def test_write_budgets_stay_flat(self):
+        for size in self.sizes:
+            self.grow(size)
+            variants = [
+                product.variants.first() for product in Product.objects.all()[:2]
+            ]
+            order = {
+                "customer_phone": "01000000000",
+                "governorate": "Cairo",
+                "city": "Nasr City",
+                "street": "Abbas El Akkad",
+                "order_items": [
+                    {"variant": variant.id, "price": 300, "quantity": 1}
+                    for variant in variants
+                ],
+            }
+            with self.subTest("new", size=size):
+                self.assertQueryBudget(
+                    26,
+                    lambda: self.client.post("/api/orders/new/", order, format="json"),
+                )
+            with self.subTest("process", size=size):
+                self.assertQueryBudget(
+                    3,
+                    lambda: self.client.put(
+                        f"/api/orders/{self.order.id}/process/", {"status": "Shipped"}
+                    ),
+                )
+            with self.subTest("delete", size=size):
+                self.assertQueryBudget(
+                    3,
+                    lambda: self.client.delete(f"/api/orders/{self.order.id}/delete/"),
+                )
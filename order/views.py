@@ -6,6 +6,8 @@ from rest_framework import status
 from payment.utils import create_cashier_payment
 from product.models import ProductVariant
 from product.models import Product
+from product.cache import cached_response
+from product.sales import record_sales
 from .serializer import OrderSerializer, OrderItemsSerializer
 from .models import Order, OrderItem, ShippingSetting
 from .serializer import ShippingSettingSerializer
@@ -16,12 +18,13 @@ from .serializer import ShippingSettingSerializer
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_orders(request):
-    orders = Order.objects.filter(user=request.user)
+    orders = Order.objects.filter(user=request.user).prefetch_related("orderitems")
     serializer = OrderSerializer(orders, many=True)
     return Response({"order": serializer.data})
 
 
 @api_view(["GET"])
+@cached_response
 def get_shipping(request):
     # جلب جميع الكائنات من موديل ShippingSetting
     shipping_settings = ShippingSetting.objects.all()
@@ -97,7 +100,7 @@ def new_order(request):
             )
 
         # السعر الحقيقي من الـ Variant
-        price = variant.price - (variant.discount or 0)
+        price = variant.final_price
 
         OrderItem.objects.create(
             order=order,
@@ -112,7 +115,7 @@ def new_order(request):
         variant.stock -= i["quantity"]
         variant.save()
 
-
+    record_sales(order)
 
     # Final response to frontend
     return Response(
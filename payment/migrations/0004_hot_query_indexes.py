@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payment", "0003_alter_paymenttransaction_opay_reference"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="paymenttransaction",
+            index=models.Index(
+                fields=["status", "created_at"], name="payment_status_created_idx"
+            ),
+        ),
+    ]
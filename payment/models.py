@@ -22,5 +22,13 @@ class PaymentTransaction(models.Model):
     # وقت الإنشاء
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # المعاملات اللي لسه PENDING من بدري
+            models.Index(
+                fields=["status", "created_at"], name="payment_status_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"OPay Ref: {self.opay_reference} - Status: {self.status}"
@@ -5,6 +5,7 @@ from django.utils.safestring import mark_safe
 from django.core.exceptions import ValidationError
 from django.utils.translation import activate
 from .models import (
+    Brand,
     Product,
     ProductImage,
     Category,
@@ -112,6 +113,14 @@ class CategoryAdmin(admin.ModelAdmin):
 
 admin.site.register(Category, CategoryAdmin)
 
+
+@admin.register(Brand)
+class BrandAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "product_count")
+    search_fields = ("name",)
+    readonly_fields = ("slug", "product_count")
+
+
 # Custom Admin Site
 admin.site.site_header = "3S Fragrance"
 
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "product"
+
+    def ready(self):
+        from . import search_index  # noqa: F401  (signals الفهرس)
+        from . import images  # noqa: F401  (signals معالجة الصور)
+        from .cache import connect_invalidation_signals
+
+        connect_invalidation_signals()
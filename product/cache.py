@@ -0,0 +1,150 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.views.decorators.http import condition
+from rest_framework.response import Response
+
+# أي تعديل في الموديلات دي بيغير رقم نسخة الكتالوج، فكل الـ responses
+# المتخزنة بالنسخة القديمة بتبطل تتقري لوحدها (من غير ما نمسح مفاتيح).
+INVALIDATING_MODELS = (
+    "product.Product",
+    "product.Brand",
+    "product.ProductVariant",
+    "product.ProductImage",
+    "product.Category",
+    "product.OfferImage",
+    "product.ReviewsImage",
+    "offers.Offer",
+    "order.ShippingSetting",
+)
+
+VERSION_KEY = "catalog:version"
+MODIFIED_KEY = "catalog:modified"
+HITS_KEY = "catalog:hits"
+MISSES_KEY = "catalog:misses"
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def catalog_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # بنبدأ بالوقت مش بـ 1 عشان لو الكاش اتمسح منرجعش لمفاتيح قديمة
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def catalog_last_modified():
+    cache = get_cache()
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        # الكاش فاضي: آخر updated_at في الموديلات، مرة واحدة لحد أول تعديل
+        dates = [
+            model.objects.aggregate(last=Max("updated_at"))["last"]
+            for model in map(apps.get_model, INVALIDATING_MODELS)
+            if any(field.name == "updated_at" for field in model._meta.fields)
+        ]
+        modified = max(filter(None, dates), default=None) or timezone.now()
+        cache.add(MODIFIED_KEY, modified, timeout=None)
+    return modified
+
+
+def bump_catalog_version(**kwargs):
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+    cache.set(MODIFIED_KEY, timezone.now(), timeout=None)
+
+
+def invalidate_catalog(**kwargs):
+    """
+    bump دلوقتي وتاني بعد الـ commit: worker تاني ممكن يشوف النسخة الجديدة
+    قبل الـ commit ويخزن الصفوف القديمة تحتها لحد CATALOG_CACHE_TIMEOUT.
+    """
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+def _count(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def cache_stats():
+    """عداد الـ hits والـ misses من ساعة ما الكاش اشتغل (لكل الـ workers)."""
+    cache = get_cache()
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+        "version": catalog_version(),
+    }
+
+
+def cached_response(view):
+    """
+    بيخزن response.data للـ GET حسب نسخة الكتالوج + الرابط كامل (بالـ query
+    string والدومين، عشان روابط الصور absolute). بيتحط تحت @api_view.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return view(request, *args, **kwargs)
+
+        cache = get_cache()
+        url = request.build_absolute_uri()
+        key = "catalog:%s:%s" % (
+            catalog_version(),
+            hashlib.md5(url.encode()).hexdigest(),
+        )
+        data = cache.get(key)
+        if data is not None:
+            _count(HITS_KEY)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _count(MISSES_KEY)
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
+
+
+# ETag و Last-Modified من نسخة الكتالوج، فالـ 304 بيرجع قبل أي query أو serializer.
+# بيتحط فوق @api_view.
+catalog_conditional = condition(
+    etag_func=lambda request, *args, **kwargs: str(catalog_version()),
+    last_modified_func=lambda request, *args, **kwargs: catalog_last_modified(),
+)
+
+
+def connect_invalidation_signals():
+    for label in INVALIDATING_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(
+            invalidate_catalog, sender=model, dispatch_uid=f"catalog:{label}"
+        )
+        post_delete.connect(
+            invalidate_catalog, sender=model, dispatch_uid=f"catalog:{label}"
+        )
@@ -0,0 +1,163 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .images import srcset
+
+# نفس to_representation بتاعة حقول DRF، فالناتج بيطلع نفس الـ JSON بالظبط
+# بس من غير ما نبني serializer وحقوله لكل منتج.
+_money = serializers.DecimalField(max_digits=7, decimal_places=2).to_representation
+_discount = serializers.DecimalField(max_digits=6, decimal_places=2).to_representation
+format_datetime = serializers.DateTimeField().to_representation
+
+
+# الحقول اللي ينفع تتطلب بـ ?fields=، وكارت المنتج في الليستة (?view=card)
+PRODUCT_FIELDS = (
+    "id",
+    "slug",
+    "name",
+    "description",
+    "category",
+    "brand",
+    "min_price",
+    "max_price",
+    "variants",
+    "allow_offer",
+    "images",
+    "created_at",
+    # مش في الـ payload الكامل، بس للكروت
+    "image",
+    "has_discount",
+)
+CARD_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "brand",
+    "min_price",
+    "max_price",
+    "image",
+    "has_discount",
+)
+
+
+def requested_fields(request):
+    """الحقول المطلوبة من ?view=card أو ?fields=a,b، و None يعني الـ payload كامل."""
+    if request.GET.get("view") == "card":
+        return CARD_FIELDS
+    names = [name.strip() for name in request.GET.get("fields", "").split(",")]
+    fields = tuple(dict.fromkeys(name for name in names if name))
+    unknown = [name for name in fields if name not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}"})
+    return fields or None
+
+
+def _image_url(image, build_url):
+    if not image:
+        return None
+    return build_url(image.url) if build_url else image.url
+
+
+def _price(value):
+    return None if value is None else round(float(value), 2)
+
+
+def variant_to_dict(variant):
+    """زي ProductVariantSerializer(variant).data."""
+    return {
+        "id": variant.id,
+        "size_ml": variant.size_ml,
+        "price": _money(variant.price),
+        "withbox": variant.withbox,
+        "travelsize": variant.travelsize,
+        "final_price": (
+            None if variant.final_price is None else _money(variant.final_price)
+        ),
+        "discount": None if variant.discount is None else _discount(variant.discount),
+        "stock": variant.stock,
+        "caption": variant.caption,
+    }
+
+
+def product_to_dict(product, build_url=None):
+    """
+    زي ProductSerializer(product).data. الـ product لازم يكون جاي من
+    with_listing_data (الصور والـ variants prefetched) وإلا هيعمل queries.
+    """
+    category = product.category
+    return {
+        "id": product.id,
+        "slug": product.slug,
+        "name": product.name,
+        "description": product.description,
+        "category": None if category is None else str(category),
+        "brand": product.brand,
+        "min_price": _price(product.min_final_price),
+        "max_price": _price(product.max_final_price),
+        "variants": [variant_to_dict(variant) for variant in product.variants.all()],
+        "allow_offer": product.allow_offer,
+        "images": _images(product, build_url),
+        "created_at": (
+            None if product.created_at is None else format_datetime(product.created_at)
+        ),
+    }
+
+
+def _images(product, build_url):
+    return [
+        {
+            "id": image.id,
+            "image": _image_url(image.image, build_url),
+            "alt_text": image.alt_text,
+            "srcset": srcset(image.image, image.image_width, build_url),
+        }
+        for image in product.images.all()
+    ]
+
+
+def _first_image(product, build_url):
+    # with_listing_data(fields=...) بيعمل prefetch لأول صورة بس في card_images
+    images = getattr(product, "card_images", None)
+    if images is None:
+        images = product.images.all()
+    return _image_url(images[0].image, build_url) if images else None
+
+
+_FIELD_GETTERS = {
+    "id": lambda product, build_url: product.id,
+    "slug": lambda product, build_url: product.slug,
+    "name": lambda product, build_url: product.name,
+    "description": lambda product, build_url: product.description,
+    "category": lambda product, build_url: (
+        None if product.category is None else str(product.category)
+    ),
+    "brand": lambda product, build_url: product.brand,
+    "min_price": lambda product, build_url: _price(product.min_final_price),
+    "max_price": lambda product, build_url: _price(product.max_final_price),
+    "variants": lambda product, build_url: [
+        variant_to_dict(variant) for variant in product.variants.all()
+    ],
+    "allow_offer": lambda product, build_url: product.allow_offer,
+    "images": lambda product, build_url: _images(product, build_url),
+    "created_at": lambda product, build_url: (
+        None if product.created_at is None else format_datetime(product.created_at)
+    ),
+    "image": _first_image,
+    "has_discount": lambda product, build_url: product.max_discount_pct > 0,
+}
+
+
+def serialize_products(products, request=None, fields=None):
+    """
+    بديل ProductSerializer(products, many=True, context={"request": request}).data
+    للـ lists اللي بتتقري كتير. من غير request روابط الصور بتفضل relative زي DRF.
+    fields (من requested_fields) بيقصر الـ payload على الحقول دي بنفس ترتيبها.
+    """
+    build_url = request.build_absolute_uri if request is not None else None
+    if fields is None:
+        return [product_to_dict(product, build_url) for product in products]
+    getters = [(name, _FIELD_GETTERS[name]) for name in fields]
+    return [
+        {name: getter(product, build_url) for name, getter in getters}
+        for product in products
+    ]
@@ -0,0 +1,74 @@
+"""
+الكتالوج كله كـ NDJSON (سطر JSON لكل منتج) للـ static build، أو بس اللي
+اتغير/اتحذف من ?since=<version>. الـ version وقت بالـ microseconds، والسطر
+الأخير في الـ feed بيرجعه عشان يتبعت في المرة الجاية.
+
+updated_at و deleted_at بيتكتبوا قبل الـ commit، فصف ممكن يظهر بعد ما feed
+بدأ وهو وقته أقدم من بدايته. عشان كده الـ version هو بداية الـ feed ناقص
+CATALOG_FEED_LAG، والتعديلات اللي في المدة دي بتتبعت تاني في الـ feed الجاي.
+الكلاينت لازم يطبق السطور كـ upsert/delete بالـ id، فتكرار السطر ما يفرقش.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .fast_serializers import product_to_dict
+from .models import Product, ProductTombstone
+from .utils import with_listing_data
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+FEED_CHUNK_SIZE = 500
+
+
+def version_from_datetime(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def datetime_from_version(version):
+    """بترفع ValueError لو الـ version مش رقم صحيح."""
+    return EPOCH + timedelta(microseconds=int(version))
+
+
+def _line(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def catalog_feed(since=None, build_url=None, chunk_size=FEED_CHUNK_SIZE):
+    """
+    Generator بسطور NDJSON:
+    {"type": "product", "data": {...}} بنفس شكل /api/product/<slug>/،
+    {"type": "deleted", "id": ..., "slug": ...} في وضع since بس،
+    وفي الآخر {"type": "version", "version": ...}.
+    """
+    # الوقت قبل القراية ومتأخر بالـ lag، فأي تعديل ممكن لسه ما اتعملوش commit
+    # هييجي تاني في المرة الجاية
+    version = version_from_datetime(timezone.now() - settings.CATALOG_FEED_LAG)
+    products = with_listing_data(Product.objects.all())
+    if since is None:
+        products = products.order_by("id")
+    else:
+        changed_after = datetime_from_version(since)
+        # الكلاينت اللي بيسأل كل شوية ما يرجعش لورا
+        version = max(version, int(since))
+        products = products.filter(updated_at__gt=changed_after).order_by(
+            "updated_at", "id"
+        )
+
+    # iterator مع chunk_size بيعمل الـ prefetch لكل chunk لوحده
+    for product in products.iterator(chunk_size=chunk_size):
+        yield _line({"type": "product", "data": product_to_dict(product, build_url)})
+
+    if since is not None:
+        tombstones = (
+            ProductTombstone.objects.filter(deleted_at__gt=changed_after)
+            .order_by("deleted_at", "id")
+            .values_list("product_id", "slug")
+        )
+        for product_id, slug in tombstones.iterator(chunk_size=chunk_size):
+            yield _line({"type": "deleted", "id": product_id, "slug": slug})
+
+    yield _line({"type": "version", "version": version})
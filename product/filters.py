@@ -1,40 +1,57 @@
-from django.db.models import F, Min, Value, DecimalField, ExpressionWrapper
-from django.db.models.functions import Coalesce
 import django_filters
-from .models import Product
+from django_filters.constants import EMPTY_VALUES
+from .models import Product, brand_slug
+
+
+class ProductOrderingFilter(django_filters.OrderingFilter):
+    """
+    bestseller و trending بيترتبوا من الأكبر للأصغر من غير "-"، وكل ترتيب
+    بيتكسر تعادله بالـ id عشان الصفحات ما تكررش منتجات.
+    """
+
+    descending_fields = {"bestseller", "trending"}
+
+    def get_ordering_value(self, param):
+        descending = param.startswith("-")
+        field = param[1:] if descending else param
+        if field in self.descending_fields:
+            descending = not descending
+        return super().get_ordering_value(f"-{field}" if descending else field)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        qs = super().filter(qs, value)
+        return qs.order_by(*qs.query.order_by, "-id")
 
 
 class ProductsFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(method="filter_min_price")
     max_price = django_filters.NumberFilter(method="filter_max_price")
-    brand = django_filters.BaseInFilter(field_name="brand", lookup_expr="in")
+    brand = django_filters.BaseInFilter(method="filter_brand")
     category = django_filters.BaseInFilter(
         field_name="category__slug", lookup_expr="in"
     )
+    ordering = ProductOrderingFilter(
+        fields=(
+            ("min_final_price", "price"),
+            ("created_at", "created_at"),
+            ("sales_total", "bestseller"),
+            ("trending_score", "trending"),
+        )
+    )
 
     class Meta:
         model = Product
         fields = ["brand", "category", "min_price", "max_price"]
 
+    def filter_brand(self, queryset, name, value):
+        # بالـ slug فـ "dior" و "Dior " و "DIOR" نفس البراند
+        return queryset.filter(brand_ref__slug__in=[brand_slug(v) for v in value])
+
     def filter_min_price(self, queryset, name, value):
-        # نجيب أقل سعر variant في المنتج ونقارن انه >= value
-        queryset = queryset.annotate(
-            lowest_variant_price=Min(
-                ExpressionWrapper(
-                    F("variants__price") - Coalesce(F("variants__discount"), Value(0)),
-                    output_field=DecimalField(),
-                )
-            )
-        )
-        return queryset.filter(lowest_variant_price__gte=value)
+        # أقل سعر variant متخزن على المنتج نفسه (min_final_price) فمفيش JOIN
+        return queryset.filter(min_final_price__gte=value)
 
     def filter_max_price(self, queryset, name, value):
-        queryset = queryset.annotate(
-            lowest_variant_price=Min(
-                ExpressionWrapper(
-                    F("variants__price") - Coalesce(F("variants__discount"), Value(0)),
-                    output_field=DecimalField(),
-                )
-            )
-        )
-        return queryset.filter(lowest_variant_price__lte=value)
+        return queryset.filter(min_final_price__lte=value)
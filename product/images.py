@@ -0,0 +1,166 @@
+"""
+معالجة الصور المرفوعة: الأصل بيتلف حسب الـ EXIF وبيتمسح منه الـ EXIF ويتضغط،
+وبيتعمل منه نسخ WebP و JPEG بعروض ثابتة (IMAGE_DERIVATIVE_WIDTHS) تحت
+media/derivatives/ عشان الفرونت يستخدمها في srcset.
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Category, OfferImage, ProductImage, ReviewsImage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MODELS = (ProductImage, Category, OfferImage, ReviewsImage)
+DERIVATIVES_DIR = "derivatives"
+FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+# الصيغ اللي الأصل بيفضل عليها بعد إعادة الضغط، غير كده بيتحول JPEG
+ORIGINAL_FORMATS = {"JPEG", "PNG", "WEBP"}
+
+
+def derivative_widths(width):
+    """العروض الثابتة الأصغر من الصورة + نسخة بعرض الصورة نفسها (من غير تكبير)."""
+    widths = [w for w in settings.IMAGE_DERIVATIVE_WIDTHS if w < width]
+    return widths + [width]
+
+
+def derivative_name(name, width, image_format):
+    # الامتداد الأصلي جزء من الاسم، عشان a.jpg و a.png ما يكتبوش على نفس النسخ
+    return f"{DERIVATIVES_DIR}/{name}-{width}w.{EXTENSIONS[image_format]}"
+
+
+def srcset(image, width, build_url=None):
+    """
+    {"webp": "url 320w, url 640w, ...", "jpeg": "..."} أو None لو الصورة
+    لسه ما اتعالجتش. رابط واحد بيتحسب من الـ storage والباقي suffix.
+    """
+    if not image or not width:
+        return None
+    base = image.storage.url(f"{DERIVATIVES_DIR}/{image.name}")
+    if build_url is not None:
+        base = build_url(base)
+    widths = derivative_widths(width)
+    return {
+        image_format: ", ".join(f"{base}-{w}w.{extension} {w}w" for w in widths)
+        for image_format, extension in EXTENSIONS.items()
+    }
+
+
+def open_image(file):
+    """(الصورة متلفة صح ومصغرة لحد IMAGE_MAX_DIMENSION, صيغتها الأصلية)."""
+    file.seek(0)
+    image = Image.open(file)
+    image.load()
+    image_format = image.format
+    # الموبايل بيحفظ الصورة بالعرض ويكتب الاتجاه في الـ EXIF
+    image = ImageOps.exif_transpose(image)
+    max_size = settings.IMAGE_MAX_DIMENSION
+    if image.width > max_size or image.height > max_size:
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+    return image, image_format
+
+
+def _rgb(image):
+    if image.mode in ("RGB", "L"):
+        return image
+    if image.mode in ("RGBA", "LA", "PA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def encode_image(image, image_format):
+    buffer = BytesIO()
+    quality = settings.IMAGE_QUALITY
+    if image_format == "JPEG":
+        _rgb(image).save(
+            buffer, "JPEG", quality=quality, optimize=True, progressive=True
+        )
+    elif image_format == "WEBP":
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        image.save(buffer, "WEBP", quality=quality, method=6)
+    else:
+        image.save(buffer, image_format, optimize=True)
+    # من غير exif= فالـ EXIF (والـ GPS) مش بيتكتب تاني
+    return buffer.getvalue()
+
+
+def optimize_original(file):
+    """(bytes من غير EXIF ومضغوطة, الصيغة, العرض) للملف المرفوع."""
+    image, image_format = open_image(file)
+    if image_format not in ORIGINAL_FORMATS:
+        image_format = "JPEG"
+    return encode_image(image, image_format), image_format, image.width
+
+
+def generate_derivatives(image):
+    """بيكتب كل النسخ للصورة المتخزنة دي وبيرجع عرض الأصل."""
+    storage = image.storage
+    with storage.open(image.name, "rb") as file:
+        source, _ = open_image(file)
+
+    for width in derivative_widths(source.width):
+        if width == source.width:
+            resized = source
+        else:
+            height = round(source.height * width / source.width)
+            resized = source.resize((width, height), Image.LANCZOS)
+        for image_format, pil_format in FORMATS.items():
+            name = derivative_name(image.name, width, image_format)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(encode_image(resized, pil_format)))
+    return source.width
+
+
+def replace_extension(name, image_format):
+    root, _ = os.path.splitext(os.path.basename(name))
+    extension = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}[image_format]
+    return f"{root}.{extension}"
+
+
+@receiver(pre_save, sender=ProductImage)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=OfferImage)
+@receiver(pre_save, sender=ReviewsImage)
+def optimize_upload(sender, instance, **kwargs):
+    image = instance.image
+    # _committed=False يعني ملف جديد لسه ما اتخزنش
+    if not image or image._committed:
+        return
+    try:
+        data, image_format, width = optimize_original(image)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning("Could not optimize upload %s", image.name, exc_info=True)
+        return
+    instance.image = ContentFile(data, name=replace_extension(image.name, image_format))
+    instance.image_width = width
+    instance._generate_derivatives = True
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=OfferImage)
+@receiver(post_save, sender=ReviewsImage)
+def create_derivatives(sender, instance, **kwargs):
+    if not getattr(instance, "_generate_derivatives", False):
+        return
+    instance._generate_derivatives = False
+    try:
+        generate_derivatives(instance.image)
+    except (OSError, UnidentifiedImageError):
+        logger.warning(
+            "Could not create derivatives for %s", instance.image.name, exc_info=True
+        )
@@ -0,0 +1,39 @@
+from timeit import Timer
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from product.fast_serializers import serialize_products
+from product.models import Product
+from product.serializers import ProductSerializer
+from product.utils import with_listing_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-product serialization cost of ProductSerializer and the fast path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=24)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        # الصفحة بتتحمل مرة واحدة، فالقياس للـ serialization بس من غير الداتابيز
+        products = list(
+            with_listing_data(Product.objects.order_by("-id"))[: options["limit"]]
+        )
+        if not products:
+            raise CommandError("No products to serialize.")
+        request = APIRequestFactory().get("/api/products/", HTTP_HOST="127.0.0.1")
+
+        candidates = {
+            "ProductSerializer": lambda: ProductSerializer(
+                products, many=True, context={"request": request}
+            ).data,
+            "serialize_products": lambda: serialize_products(products, request),
+        }
+        for name, serialize in candidates.items():
+            seconds = min(Timer(serialize).repeat(repeat=5, number=options["repeat"]))
+            per_item = seconds / options["repeat"] / len(products) * 1_000_000
+            self.stdout.write(f"{name:<20} {per_item:8.1f} µs/product")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from product.recommendations import build_product_relations
+
+
+class Command(BaseCommand):
+    help = "Rebuild the 'customers also bought' table from order co-purchases."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=12)
+        parser.add_argument(
+            "--half-life-days",
+            type=float,
+            default=90,
+            help="An order this old counts half as much as one placed today.",
+        )
+        parser.add_argument("--min-score", type=float, default=0.0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = build_product_relations(
+            top_k=options["top_k"],
+            half_life_days=options["half_life_days"],
+            min_score=options["min_score"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} product relations."))
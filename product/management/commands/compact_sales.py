@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from product.sales import compact_sales
+
+
+class Command(BaseCommand):
+    help = "Recompute 7-day sales and trending scores from daily sales (run nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=None,
+            help="Delete daily sales rows older than this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        updated, deleted = compact_sales(
+            keep_days=options["keep_days"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {updated} products, deleted {deleted} daily sales rows."
+            )
+        )
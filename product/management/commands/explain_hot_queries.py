@@ -0,0 +1,108 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from cart.models import Cart
+from order.models import Order, OrderItem
+from payment.models import PaymentTransaction
+from product.models import Brand, Product, ProductVariant
+
+# أشكال الـ queries اللي بتتنفذ في كل request تقريبًا. القيم نفسها مش فارقة
+# في الـ plan، المهم شكل الـ WHERE والـ ORDER BY
+HOT_QUERIES = {
+    "product list": lambda: Product.objects.order_by("-priority", "-id")[:24],
+    "product by slug": lambda: Product.objects.filter(slug="perf-1"),
+    "best sellers": lambda: Product.objects.order_by("-sales_total", "-id")[:24],
+    "flash sale": lambda: Product.objects.flash_sale()[:10],
+    "variants of product": lambda: ProductVariant.objects.filter(product_id=1).order_by(
+        "size_ml"
+    ),
+    "variants of page": lambda: ProductVariant.objects.filter(
+        product_id__in=range(1, 25)
+    ),
+    "brand list": lambda: Brand.objects.filter(product_count__gt=0).order_by(
+        "-product_count", "name"
+    )[:10],
+    "guest cart": lambda: Cart.objects.filter(session_key="perf-1"),
+    "order by reference": lambda: Order.objects.filter(opay_reference="perf-1"),
+    "user orders": lambda: Order.objects.filter(user_id=1).order_by("-created_at"),
+    "order items": lambda: OrderItem.objects.filter(order_id=1),
+    "payment by reference": lambda: PaymentTransaction.objects.filter(
+        opay_reference="perf-1"
+    ),
+    "stale pending payments": lambda: PaymentTransaction.objects.filter(
+        status="PENDING", created_at__lt=timezone.now() - timedelta(hours=1)
+    ).order_by("created_at"),
+}
+
+# سطر الـ plan اللي معناه إن الجدول كله بيتقري
+SEQUENTIAL_SCAN = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    # "SCAN table" من غير USING INDEX (SEARCH و SCAN ... USING INDEX تمام)
+    "sqlite": re.compile(r"\bSCAN (\w+)$"),
+}
+
+
+def sequential_scans(plan, vendor=None):
+    """أسماء الجداول اللي الـ plan بيقراها كلها."""
+    pattern = SEQUENTIAL_SCAN.get(vendor or connection.vendor)
+    if pattern is None:
+        return []
+    return [
+        match.group(1)
+        for line in plan.splitlines()
+        if (match := pattern.search(line.strip()))
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the hot query shapes and fail if any needs a sequential "
+        "scan. Run it against seeded data (manage.py seed_perf), since planners "
+        "prefer sequential scans on tiny tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE (PostgreSQL only, executes the queries).",
+        )
+        parser.add_argument(
+            "--only", nargs="*", default=None, help="Names of the queries to explain."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQUENTIAL_SCAN:
+            self.stderr.write(
+                f"Sequential scans are not detected on {connection.vendor}."
+            )
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options["analyze"] = True
+
+        names = options["only"] or list(HOT_QUERIES)
+        unknown = set(names) - set(HOT_QUERIES)
+        if unknown:
+            raise CommandError(f"Unknown queries: {', '.join(sorted(unknown))}")
+
+        flagged = []
+        for name in names:
+            plan = HOT_QUERIES[name]().explain(**explain_options)
+            tables = sequential_scans(plan)
+            style = self.style.ERROR if tables else self.style.SUCCESS
+            status = f"SEQ SCAN on {', '.join(tables)}" if tables else "ok"
+            self.stdout.write(style(f"{name}: {status}"))
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+            if tables:
+                flagged.append(name)
+
+        if flagged:
+            raise CommandError(
+                f"{len(flagged)} hot queries use a sequential scan: {', '.join(flagged)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(names)} hot queries use indexes."))
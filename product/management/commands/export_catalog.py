@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from product.feed import FEED_CHUNK_SIZE, catalog_feed, datetime_from_version
+
+
+class Command(BaseCommand):
+    help = "Write the catalog (or the changes since a version) as NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since", help="Version from the last export's final line."
+        )
+        parser.add_argument("--output", help="File to write to (default: stdout).")
+        parser.add_argument(
+            "--base-url",
+            default="",
+            help="Prefix for image URLs, e.g. https://api.3sfragrance.com",
+        )
+        parser.add_argument("--chunk-size", type=int, default=FEED_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        if since is not None:
+            try:
+                datetime_from_version(since)
+            except (ValueError, OverflowError):
+                raise CommandError(f"Invalid --since version: {since}")
+
+        base_url = options["base_url"].rstrip("/")
+        lines = catalog_feed(
+            since,
+            build_url=(lambda url: base_url + url) if base_url else None,
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,89 @@
+import os
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from PIL import Image, UnidentifiedImageError
+
+from product.cache import bump_catalog_version
+from product.images import (
+    FORMATS,
+    IMAGE_MODELS,
+    derivative_name,
+    derivative_widths,
+    replace_extension,
+    generate_derivatives,
+    optimize_original,
+)
+
+
+class Command(BaseCommand):
+    help = "Strip EXIF from, recompress and create WebP/JPEG derivatives for existing images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Reprocess images that already have derivatives.",
+        )
+        parser.add_argument(
+            "--skip-originals",
+            action="store_true",
+            help="Only create derivatives, leave the uploaded files untouched.",
+        )
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for model in IMAGE_MODELS:
+            queryset = model.objects.exclude(image="").exclude(image__isnull=True)
+            if not options["force"]:
+                queryset = queryset.filter(image_width__isnull=True)
+
+            for obj in queryset.only("id", "image", "image_width").iterator(
+                chunk_size=200
+            ):
+                storage = obj.image.storage
+                original = name = obj.image.name
+                try:
+                    if not options["skip_originals"]:
+                        name = self.rewrite_original(obj.image)
+                        obj.image.name = name
+                    width = generate_derivatives(obj.image)
+                except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+                    failed += 1
+                    self.stderr.write(f"Skipped {model.__name__} #{obj.pk}: {name}")
+                    if name != original:
+                        storage.delete(name)
+                    continue
+                # update عشان منعملش pre_save/post_save تاني على كل صورة
+                model.objects.filter(pk=obj.pk).update(image=name, image_width=width)
+                processed += 1
+                if name != original:
+                    # الصف بقى بيشاور على الملف الجديد، فالقديم ونسخه ممكن يتمسحوا
+                    self.delete_files(storage, original, obj.image_width)
+
+        if processed:
+            bump_catalog_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"Processed {processed} images ({failed} skipped).")
+        )
+
+    def rewrite_original(self, image):
+        """
+        بيحفظ الأصل المضغوط باسم فاضي جنب القديم ومش بيمسح القديم، عشان لو
+        الحفظ وقع الصف يفضل بيشاور على ملف موجود.
+        """
+        storage = image.storage
+        with storage.open(image.name, "rb") as file:
+            data, image_format, _ = optimize_original(file)
+
+        directory = os.path.dirname(image.name)
+        name = os.path.join(directory, replace_extension(image.name, image_format))
+        return storage.save(storage.get_available_name(name), ContentFile(data))
+
+    def delete_files(self, storage, name, width):
+        storage.delete(name)
+        if not width:
+            return
+        for derivative_width in derivative_widths(width):
+            for image_format in FORMATS:
+                storage.delete(derivative_name(name, derivative_width, image_format))
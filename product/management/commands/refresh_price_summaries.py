@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from product.models import Product, refresh_price_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored min/max price, discount and stock of every product."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+
+        for start in range(0, len(product_ids), batch_size):
+            refresh_price_summaries(product_ids[start : start + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed {len(product_ids)} product summaries.")
+        )
@@ -0,0 +1,367 @@
+import random
+import time
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from account.models import Profile
+from cart.models import Cart, CartItem
+from offers.models import Offer
+from offers.rules import bump_rules_version
+from order.models import Order, OrderItem, PaymentStatus, ShippingSetting
+from payment.models import PaymentTransaction
+from product.cache import bump_catalog_version
+from product.models import (
+    Brand,
+    Category,
+    Product,
+    ProductImage,
+    ProductVariant,
+    refresh_brand_counts,
+    update_search_vectors,
+)
+
+SIZES = (3, 6, 10, 30, 50, 100)
+OFFER_SIZES = [size for size, _ in Offer.SIZE_CHOICES]
+BRANDS = (
+    "Dior",
+    "Chanel",
+    "Tom Ford",
+    "Lattafa",
+    "Armaf",
+    "Rasasi",
+    "Ajmal",
+    "Gucci",
+    "Versace",
+    "Creed",
+    "Afnan",
+    "Paco Rabanne",
+)
+WORDS = ("Oud", "Musk", "Amber", "Rose", "Noir", "Intense", "Royal", "Blue", "Vanilla")
+GOVERNORATES = ("Cairo", "Giza", "Alexandria", "Dakahlia", "Sharqia", "Aswan")
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Bulk-create synthetic catalog, carts and orders for load and scaling tests."
+
+    def add_arguments(self, parser):
+        counts = parser.add_argument_group("row counts")
+        counts.add_argument("--categories", type=int, default=20)
+        counts.add_argument("--products", type=int, default=1000)
+        counts.add_argument("--variants-per-product", type=int, default=3)
+        counts.add_argument("--images-per-product", type=int, default=2)
+        counts.add_argument("--offers", type=int, default=8)
+        counts.add_argument("--shipping", type=int, default=len(GOVERNORATES))
+        counts.add_argument("--users", type=int, default=500)
+        counts.add_argument("--carts", type=int, default=200)
+        counts.add_argument("--items-per-cart", type=int, default=3)
+        counts.add_argument("--orders", type=int, default=2000)
+        counts.add_argument("--items-per-order", type=int, default=5)
+        counts.add_argument("--transactions", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.started = time.monotonic()
+
+        categories = self.seed_categories(options["categories"])
+        variants = self.seed_products(
+            options["products"],
+            categories,
+            options["variants_per_product"],
+            options["images_per_product"],
+        )
+        self.seed_offers(options["offers"])
+        self.seed_shipping(options["shipping"])
+        user_ids = self.seed_users(options["users"])
+        cart_ids = self.seed_carts(
+            options["carts"], user_ids, list(variants), options["items_per_cart"]
+        )
+        self.seed_orders(
+            options["orders"], user_ids, variants, options["items_per_order"]
+        )
+        self.seed_transactions(options["transactions"], cart_ids)
+
+        # bulk_create مش بيبعت signals، فالكاش والبراندات والبحث وجدول العروض
+        # بيتحدثوا هنا مرة واحدة
+        refresh_brand_counts(Brand.objects.values_list("id", flat=True))
+        update_search_vectors(
+            Product.objects.filter(search_vector__isnull=True).values("pk")
+        )
+        bump_catalog_version()
+        bump_rules_version()
+        self.stdout.write(self.style.SUCCESS(f"Done in {self.elapsed()}."))
+
+    def elapsed(self):
+        return f"{time.monotonic() - self.started:.1f}s"
+
+    def report(self, model, count):
+        self.stdout.write(f"{model.__name__:<20} {count:>10,} rows  ({self.elapsed()})")
+
+    def bulk_create(self, model, objs):
+        """بيرجع الـ objects بالـ ids (RETURNING على PostgreSQL و SQLite)."""
+        created = []
+        for batch in batched(objs, self.batch_size):
+            with transaction.atomic():
+                created += model._base_manager.bulk_create(batch)
+        self.report(model, len(created))
+        return created
+
+    def seed_categories(self, count):
+        start = Category.objects.count()
+        return self.bulk_create(
+            Category,
+            (
+                Category(name=f"Category {index}", slug=f"category-{index}")
+                for index in range(start, start + count)
+            ),
+        )
+
+    def seed_products(self, count, categories, variants_per_product, images):
+        brands = [Brand.for_name(name) for name in BRANDS]
+        start = Product.objects.count()
+        # {variant_id: product_id} للكارتات والأوردرات
+        variant_products = {}
+        product_rows = variant_rows = image_rows = 0
+
+        # المنتجات بالدفعة عشان الـ variants والصور تاخد الـ ids من غير ما
+        # نخزن 100k منتج في الميموري
+        for indexes in batched(range(start, start + count), self.batch_size):
+            products, variants = [], []
+            for index in indexes:
+                brand = self.random.choice(brands)
+                name = f"{brand.name} {' '.join(self.random.sample(WORDS, 2))}"
+                product_variants = self.variants(variants_per_product)
+                final_prices = [v.price - (v.discount or 0) for v in product_variants]
+                products.append(
+                    Product(
+                        name=name,
+                        slug=f"perf-{index}",
+                        description=f"{name} eau de parfum.",
+                        brand=brand.name,
+                        brand_ref=brand,
+                        category=self.random.choice(categories) if categories else None,
+                        priority=self.random.randint(1, 5),
+                        # نفس اللي refresh_price_summaries بيحسبه
+                        min_final_price=min(final_prices, default=None),
+                        max_final_price=max(final_prices, default=None),
+                        max_discount_pct=max(
+                            (
+                                min(round((v.discount or 0) * 100 / v.price, 2), 100)
+                                for v in product_variants
+                            ),
+                            default=0,
+                        ),
+                        total_stock=sum(v.stock for v in product_variants),
+                    )
+                )
+                variants.append(product_variants)
+
+            with transaction.atomic():
+                products = Product._base_manager.bulk_create(products)
+                for product, product_variants in zip(products, variants):
+                    for variant in product_variants:
+                        variant.product = product
+                created = ProductVariant._base_manager.bulk_create(
+                    [v for product_variants in variants for v in product_variants]
+                )
+                ProductImage._base_manager.bulk_create(
+                    ProductImage(
+                        product=product, image=f"product_images/{product.slug}-{n}.jpg"
+                    )
+                    for product in products
+                    for n in range(images)
+                )
+            variant_products.update((v.id, v.product_id) for v in created)
+            product_rows += len(products)
+            variant_rows += len(created)
+            image_rows += len(products) * images
+
+        self.report(Product, product_rows)
+        self.report(ProductVariant, variant_rows)
+        self.report(ProductImage, image_rows)
+        return variant_products
+
+    def variants(self, count):
+        sizes = sorted(self.random.sample(SIZES, min(count, len(SIZES))))
+        variants = []
+        for size in sizes:
+            price = Decimal(self.random.randrange(100, 5000, 5))
+            discount = None
+            if self.random.random() < 0.2:
+                discount = (price * Decimal(self.random.randint(5, 40)) / 100).quantize(
+                    Decimal("1")
+                )
+            variants.append(
+                ProductVariant(
+                    size_ml=size,
+                    price=price,
+                    discount=discount,
+                    stock=self.random.choice((0, 3, 10, 25, 50)),
+                    travelsize=size <= 10,
+                )
+            )
+        return variants
+
+    def seed_offers(self, count):
+        self.bulk_create(
+            Offer,
+            (
+                Offer(
+                    title=f"Offer {index}",
+                    size_ml=self.random.choice(OFFER_SIZES),
+                    required_quantity=self.random.randint(2, 5),
+                    gift_quantity=self.random.randint(0, 1),
+                    original_price=Decimal(500),
+                    offer_price=Decimal(self.random.randrange(300, 480, 10)),
+                    priority=index,
+                    image=f"offers/specials/offer-{index}.jpg",
+                )
+                for index in range(count)
+            ),
+        )
+
+    def seed_shipping(self, count):
+        existing = set(ShippingSetting.objects.values_list("governorate", flat=True))
+        names = [*GOVERNORATES, *(f"Governorate {n}" for n in range(count))]
+        names = [name for name in names if name not in existing][:count]
+        self.bulk_create(
+            ShippingSetting,
+            (
+                ShippingSetting(
+                    governorate=name, cost=Decimal(self.random.randrange(40, 120, 5))
+                )
+                for name in names
+            ),
+        )
+
+    def seed_users(self, count):
+        start = User.objects.count()
+        # كلمة سر واحدة متحسبة مرة، الـ hashing لكل يوزر بياخد ساعات
+        password = make_password("perf-password")
+        users = self.bulk_create(
+            User,
+            (
+                User(
+                    username=f"perf{index}@example.com",
+                    email=f"perf{index}@example.com",
+                    password=password,
+                )
+                for index in range(start, start + count)
+            ),
+        )
+        self.bulk_create(Profile, (Profile(user=user) for user in users))
+        return [user.id for user in users]
+
+    def seed_carts(self, count, user_ids, variant_ids, items_per_cart):
+        if not variant_ids:
+            return []
+        # اليوزر ليه كارت واحد، والباقي كارتات ضيوف بـ session
+        owners = set(
+            Cart.objects.filter(user__isnull=False).values_list("user", flat=True)
+        )
+        owners = [user_id for user_id in user_ids if user_id not in owners][:count]
+        start = Cart.objects.count()
+        carts = self.bulk_create(
+            Cart,
+            (
+                (
+                    Cart(user_id=owners[index])
+                    if index < len(owners)
+                    else Cart(session_key=f"perf-{start + index}")
+                )
+                for index in range(count)
+            ),
+        )
+        self.bulk_create(
+            CartItem,
+            (
+                CartItem(cart=cart, variant_id=variant_id, quantity=self.quantity())
+                for cart in carts
+                for variant_id in self.random.sample(
+                    variant_ids, min(items_per_cart, len(variant_ids))
+                )
+            ),
+        )
+        return [cart.id for cart in carts]
+
+    def quantity(self):
+        return self.random.choice((1, 1, 1, 2, 3))
+
+    def seed_orders(self, count, user_ids, variant_products, items_per_order):
+        if not variant_products:
+            return
+        variant_ids = list(variant_products)
+        order_rows = item_rows = 0
+        for batch in batched(range(count), self.batch_size):
+            orders, items = [], []
+            for _ in batch:
+                size = max(1, round(self.random.gauss(items_per_order, 1.5)))
+                order_items = [
+                    OrderItem(
+                        product_id=variant_products[variant_id],
+                        variant_id=variant_id,
+                        name=f"Variant {variant_id}",
+                        quantity=self.quantity(),
+                        price=Decimal(self.random.randrange(100, 5000, 5)),
+                    )
+                    for variant_id in self.random.sample(
+                        variant_ids, min(size, len(variant_ids))
+                    )
+                ]
+                orders.append(
+                    Order(
+                        user_id=self.random.choice(user_ids) if user_ids else None,
+                        customer_phone=f"010{self.random.randrange(10**8):08d}",
+                        governorate=self.random.choice(GOVERNORATES),
+                        city="Perf City",
+                        street=f"Street {self.random.randint(1, 500)}",
+                        total_amount=sum(i.price * i.quantity for i in order_items),
+                        payment_status=self.random.choice(PaymentStatus.values),
+                    )
+                )
+                items.append(order_items)
+
+            with transaction.atomic():
+                orders = Order._base_manager.bulk_create(orders)
+                for order, order_items in zip(orders, items):
+                    for item in order_items:
+                        item.order = order
+                items = [item for order_items in items for item in order_items]
+                for chunk in batched(items, self.batch_size):
+                    OrderItem._base_manager.bulk_create(chunk)
+            order_rows += len(orders)
+            item_rows += len(items)
+        self.report(Order, order_rows)
+        self.report(OrderItem, item_rows)
+
+    def seed_transactions(self, count, cart_ids):
+        start = PaymentTransaction.objects.count()
+        self.bulk_create(
+            PaymentTransaction,
+            (
+                PaymentTransaction(
+                    opay_reference=f"perf-{start + index}",
+                    cart_id=self.random.choice(cart_ids) if cart_ids else None,
+                    checkout_address_json={
+                        "governorate": self.random.choice(GOVERNORATES),
+                        "customer_phone": "01000000000",
+                        "method": "card",
+                    },
+                    status=self.random.choice(("PENDING", "SUCCESS", "FAILED")),
+                )
+                for index in range(count)
+            ),
+        )
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+def backfill_price_summaries(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+
+    products = Product.objects.prefetch_related("variants")
+    for product in products.iterator(chunk_size=500):
+        variants = list(product.variants.all())
+        final_prices = [v.price - (v.discount or 0) for v in variants]
+        discounts = [
+            round((v.discount or 0) * 100 / v.price, 2) for v in variants if v.price
+        ]
+        product.min_final_price = min(final_prices, default=None)
+        product.max_final_price = max(final_prices, default=None)
+        product.max_discount_pct = max(discounts, default=0)
+        product.total_stock = sum(v.stock for v in variants)
+        product.save(
+            update_fields=[
+                "min_final_price",
+                "max_final_price",
+                "max_discount_pct",
+                "total_stock",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("product", "0023_product_allow_offer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="max_discount_pct",
+            field=models.DecimalField(
+                db_index=True, decimal_places=2, default=0, editable=False, max_digits=5
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="max_final_price",
+            field=models.DecimalField(
+                db_index=True, decimal_places=2, editable=False, max_digits=7, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="min_final_price",
+            field=models.DecimalField(
+                db_index=True, decimal_places=2, editable=False, max_digits=7, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="total_stock",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_price_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:50
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0024_product_price_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productvariant",
+            name="discount_pct",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        price__gt=0,
+                        then=django.db.models.functions.comparison.Least(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    django.db.models.functions.comparison.Coalesce(
+                                        models.F("discount"),
+                                        models.Value(0),
+                                        output_field=models.DecimalField(),
+                                    ),
+                                    "*",
+                                    models.Value(100.0),
+                                ),
+                                "/",
+                                models.F("price"),
+                            ),
+                            models.Value(100),
+                            output_field=models.DecimalField(),
+                        ),
+                    ),
+                    default=models.Value(0),
+                    output_field=models.DecimalField(),
+                ),
+                output_field=models.DecimalField(decimal_places=2, max_digits=5),
+            ),
+        ),
+        migrations.AddField(
+            model_name="productvariant",
+            name="final_price",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.F("price"),
+                    "-",
+                    django.db.models.functions.comparison.Coalesce(
+                        models.F("discount"),
+                        models.Value(0),
+                        output_field=models.DecimalField(),
+                    ),
+                ),
+                output_field=models.DecimalField(decimal_places=2, max_digits=7),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productvariant",
+            index=models.Index(fields=["final_price"], name="variant_final_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="productvariant",
+            index=models.Index(
+                fields=["discount_pct"], name="variant_discount_pct_idx"
+            ),
+        ),
+    ]
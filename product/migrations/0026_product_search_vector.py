@@ -0,0 +1,52 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# الـ indexes والـ extension دي PostgreSQL بس، على SQLite البحث بيرجع لـ icontains
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS product_search_vector_gin "
+    "ON product_product USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS product_name_trgm "
+    "ON product_product USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_brand_trgm "
+    "ON product_product USING gin (brand gin_trgm_ops)",
+    "UPDATE product_product SET search_vector = "
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS product_search_vector_gin",
+    "DROP INDEX IF EXISTS product_name_trgm",
+    "DROP INDEX IF EXISTS product_brand_trgm",
+]
+
+
+def run_on_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("product", "0025_productvariant_final_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(
+            run_on_postgres(POSTGRES_FORWARD), run_on_postgres(POSTGRES_BACKWARD)
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0027_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("max_discount_pct__gte", 5)),
+                fields=["-max_discount_pct", "-id"],
+                name="product_flash_sale_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0030_product_tombstone"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductRelation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("rank", models.PositiveSmallIntegerField()),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="relations",
+                        to="product.product",
+                    ),
+                ),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="product.product",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["product", "rank"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("product", "rank"), name="unique_product_relation_rank"
+                    )
+                ],
+            },
+        ),
+    ]
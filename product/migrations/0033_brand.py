@@ -0,0 +1,152 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:15
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.text import slugify
+
+
+def _slug(name):
+    return slugify(name, allow_unicode=True) or name.casefold()
+
+
+def populate_brands(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    Brand = apps.get_model("product", "Brand")
+    BrandCategoryCount = apps.get_model("product", "BrandCategoryCount")
+
+    # كل الكتابات المختلفة لنفس البراند تحت slug واحد، والاسم هو الأكتر استخدامًا
+    spellings = defaultdict(Counter)
+    for brand, count in (
+        Product.objects.order_by().values_list("brand").annotate(count=Count("id"))
+    ):
+        name = " ".join(brand.split())
+        spellings[_slug(name)][name] += count
+
+    brands = {}
+    for slug, names in spellings.items():
+        name = min(names, key=lambda name: (-names[name], name))
+        brands[slug] = Brand.objects.create(
+            name=name, slug=slug, product_count=sum(names.values())
+        )
+
+    products = list(Product.objects.only("id", "brand"))
+    for product in products:
+        product.brand_ref = brands[_slug(" ".join(product.brand.split()))]
+        product.brand = product.brand_ref.name
+    Product.objects.bulk_update(products, ["brand", "brand_ref"], batch_size=500)
+
+    BrandCategoryCount.objects.bulk_create(
+        BrandCategoryCount(
+            brand_id=brand_id, category_id=category_id, product_count=count
+        )
+        for brand_id, category_id, count in Product.objects.filter(
+            category__isnull=False
+        )
+        .order_by()
+        .values_list("brand_ref_id", "category_id")
+        .annotate(count=Count("id"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0032_sales_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Brand",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                (
+                    "slug",
+                    models.SlugField(
+                        allow_unicode=True, editable=False, max_length=60, unique=True
+                    ),
+                ),
+                (
+                    "product_count",
+                    models.PositiveIntegerField(default=0, editable=False),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["name"],
+                "indexes": [
+                    models.Index(
+                        fields=["-product_count", "name"], name="brand_count_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="brand_ref",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="products",
+                to="product.brand",
+            ),
+        ),
+        migrations.CreateModel(
+            name="BrandCategoryCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("product_count", models.PositiveIntegerField(default=0)),
+                (
+                    "brand",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="category_counts",
+                        to="product.brand",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="brand_counts",
+                        to="product.category",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["category", "-product_count"],
+                        name="brand_category_count_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("brand", "category"), name="unique_brand_category_count"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_brands, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0033_brand"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["-priority", "-id"], name="product_priority_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productvariant",
+            index=models.Index(
+                fields=["product", "size_ml"], name="variant_product_size_idx"
+            ),
+        ),
+        # بعد ما variant_product_size_idx يتعمل، عشان الـ FK ما يفضلش من غير index
+        migrations.AlterField(
+            model_name="productvariant",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="variants",
+                to="product.product",
+            ),
+        ),
+    ]
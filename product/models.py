@@ -1,7 +1,27 @@
-from django.db import models
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, connection, transaction
+from django.db.models import (
+    F,
+    Value,
+    Case,
+    When,
+    Min,
+    Max,
+    Sum,
+    Count,
+    DecimalField,
+)
+from django.db.models.functions import Coalesce, Least
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 
+from .cache import invalidate_catalog
+
 
 # Create your models here.
 class Category(models.Model):
@@ -9,9 +29,11 @@ class Category(models.Model):
     short_description = models.CharField(max_length=100, blank=True, null=True)
     slug = models.SlugField(max_length=120, unique=True, blank=True)
     image = models.ImageField(upload_to="category_images/", blank=True, null=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
     is_special = models.BooleanField(default=False)
     special_title = models.CharField(max_length=100, blank=True, null=True)
     special_description = models.CharField(max_length=100, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -25,6 +47,94 @@ class Category(models.Model):
         super().save(*args, **kwargs)
 
 
+def normalize_brand_name(name):
+    return " ".join(name.split())
+
+
+def brand_slug(name):
+    """نفس الـ slug لـ "Dior" و " dior " و "DIOR"، وده اللي الفلترة بتقارن بيه."""
+    name = normalize_brand_name(name)
+    return slugify(name, allow_unicode=True) or name.casefold()
+
+
+class Brand(models.Model):
+    """
+    البراند متخزن مرة واحدة، وعدد منتجاته (كله ولكل قسم) بيتحدث مع حفظ أو
+    حذف أي منتج (refresh_brand_counts) فقايمة البراندات مش بتعمل GROUP BY.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    # دايمًا من الاسم، فلو البراند اتغير اسمه المنتجات تفضل متوصلة بيه
+    slug = models.SlugField(
+        max_length=60, unique=True, allow_unicode=True, editable=False
+    )
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+        indexes = [
+            models.Index(fields=["-product_count", "name"], name="brand_count_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.name = normalize_brand_name(self.name)
+        self.slug = brand_slug(self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def for_name(cls, name):
+        name = normalize_brand_name(name)
+        brand, _ = cls.objects.get_or_create(
+            slug=brand_slug(name), defaults={"name": name}
+        )
+        return brand
+
+
+class BrandCategoryCount(models.Model):
+    brand = models.ForeignKey(
+        Brand, related_name="category_counts", on_delete=models.CASCADE
+    )
+    category = models.ForeignKey(
+        Category, related_name="brand_counts", on_delete=models.CASCADE
+    )
+    product_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["brand", "category"], name="unique_brand_category_count"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["category", "-product_count"],
+                name="brand_category_count_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.brand_id} in {self.category_id}: {self.product_count}"
+
+
+# أقل نسبة خصم عشان المنتج يظهر في الـ flash sale
+FLASH_SALE_MIN_DISCOUNT = 5
+
+
+class ProductQuerySet(models.QuerySet):
+    def flash_sale(self):
+        """
+        ترتيب الـ flash sale من ملخص الخصم المتخزن على المنتج، فمفيش scan
+        على الـ variants. الترتيب ثابت (id بيكسر التعادل) وماشي على product_flash_sale_idx.
+        """
+        return self.filter(max_discount_pct__gte=FLASH_SALE_MIN_DISCOUNT).order_by(
+            "-max_discount_pct", "-id"
+        )
+
+
 class Product(models.Model):
     name = models.CharField(max_length=200, unique=False, blank=False)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
@@ -33,26 +143,190 @@ class Product(models.Model):
         Category, null=True, blank=True, on_delete=models.SET_NULL
     )
     brand = models.CharField(max_length=50, blank=False)
+    # بيتحدد من brand في save، و brand نفسه بياخد اسم البراند المتخزن
+    brand_ref = models.ForeignKey(
+        Brand,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="products",
+        on_delete=models.PROTECT,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     addedBy = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
-    priority = models.PositiveIntegerField(default=1)  
+    priority = models.PositiveIntegerField(default=1)
 
     allow_offer = models.BooleanField(default=True, verbose_name="يدخل في العروض")
+
+    # ملخص الـ variants متخزن على المنتج عشان الفلترة والترتيب بالسعر
+    # بيتحدث تلقائي مع أي تعديل في الـ variants (refresh_price_summaries)
+    min_final_price = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, editable=False, db_index=True
+    )
+    max_final_price = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, editable=False, db_index=True
+    )
+    max_discount_pct = models.DecimalField(
+        max_digits=5, decimal_places=2, default=0, editable=False, db_index=True
+    )
+    total_stock = models.PositiveIntegerField(default=0, editable=False)
+
+    # فهرس البحث (PostgreSQL بس): الاسم > البراند > الوصف
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # عدادات المبيعات: بتزيد مع كل أوردر (product.sales.record_sales)
+    # و manage.py compact_sales بيعيد حساب الـ 7 أيام والـ trending كل ليلة
+    sales_total = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    sales_7d = models.PositiveIntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0, editable=False, db_index=True)
+
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
-        ordering = ["priority", "-id"]  
+        ordering = ["priority", "-id"]
+        indexes = [
+            # ترتيب صفحة المنتجات الافتراضي
+            models.Index(fields=["-priority", "-id"], name="product_priority_idx"),
+            models.Index(
+                fields=["-max_discount_pct", "-id"],
+                condition=models.Q(max_discount_pct__gte=FLASH_SALE_MIN_DISCOUNT),
+                name="product_flash_sale_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # البراند القديم عشان لو اتغير نحدث عدده هو كمان
+        instance._loaded_brand_ref_id = instance.__dict__.get("brand_ref_id")
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if self.brand_ref_id is None or brand_slug(self.brand) != self.brand_ref.slug:
+            self.brand_ref = Brand.for_name(self.brand)
+        self.brand = self.brand_ref.name
         super().save(*args, **kwargs)
 
 
+def refresh_brand_counts(brand_ids):
+    """يعيد عد منتجات البراندات دي، كلها ولكل قسم، من جدول المنتجات."""
+    brand_ids = {brand_id for brand_id in brand_ids if brand_id is not None}
+    if not brand_ids:
+        return
+    rows = (
+        Product.objects.filter(brand_ref__in=brand_ids)
+        .order_by()
+        .values_list("brand_ref_id", "category_id")
+        .annotate(count=Count("id"))
+    )
+    totals = defaultdict(int)
+    per_category = []
+    for brand_id, category_id, count in rows:
+        totals[brand_id] += count
+        if category_id is not None:
+            per_category.append(
+                BrandCategoryCount(
+                    brand_id=brand_id, category_id=category_id, product_count=count
+                )
+            )
+
+    with transaction.atomic():
+        for brand_id in brand_ids:
+            Brand.objects.filter(pk=brand_id).update(product_count=totals[brand_id])
+        BrandCategoryCount.objects.filter(brand_id__in=brand_ids).delete()
+        BrandCategoryCount.objects.bulk_create(per_category)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_brand_counts(sender, instance, **kwargs):
+    previous = getattr(instance, "_loaded_brand_ref_id", None)
+    refresh_brand_counts([instance.brand_ref_id, previous])
+    instance._loaded_brand_ref_id = instance.brand_ref_id
+
+
+@receiver(post_save, sender=Brand)
+def rename_brand_products(sender, instance, **kwargs):
+    # اسم البراند على المنتج نسخة من Brand.name عشان السيريالايزر والبحث
+    product_ids = list(
+        Product.objects.filter(brand_ref=instance)
+        .exclude(brand=instance.name)
+        .values_list("id", flat=True)
+    )
+    if not product_ids:
+        return
+    Product.objects.filter(pk__in=product_ids).update(
+        brand=instance.name, updated_at=timezone.now()
+    )
+    # update مش بيبعت post_save، فالـ search_vector لازم يتحدث بالاسم الجديد
+    update_search_vectors(product_ids)
+
+
+SEARCH_CONFIG = "simple"
+
+
+def update_search_vectors(product_ids):
+    """يحدث search_vector للمنتجات دي، على SQLite مفيش full-text فمش بنعمل حاجة."""
+    if connection.vendor != "postgresql":
+        return
+    Product.objects.filter(pk__in=product_ids).update(
+        search_vector=SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("brand", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, **kwargs):
+    update_search_vectors([instance.pk])
+
+
+class ProductVariantQuerySet(models.QuerySet):
+    """
+    update/bulk_* مش بيبعتوا signals ولا بيحدثوا auto_now، فبنعمل ده هنا
+    ونحدث ملخص أسعار المنتجات.
+    """
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        product_ids = set(self.values_list("product_id", flat=True))
+        rows = super().update(**kwargs)
+        if "product" in kwargs or "product_id" in kwargs:
+            new_product = kwargs.get("product", kwargs.get("product_id"))
+            product_ids.add(getattr(new_product, "pk", new_product))
+        refresh_price_summaries(product_ids)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        fields = {*fields, "updated_at"}
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        refresh_price_summaries(obj.product_id for obj in objs)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        refresh_price_summaries(obj.product_id for obj in created)
+        return created
+
+    def update_counters(self, **kwargs):
+        """update لعدادات المبيعات بس: من غير ملخص أسعار ولا updated_at."""
+        return super().update(**kwargs)
+
+
 class ProductVariant(models.Model):
+    # من غير index لوحده: variant_product_size_idx بيبدأ بـ product
     product = models.ForeignKey(
-        Product, related_name="variants", on_delete=models.CASCADE
+        Product, related_name="variants", on_delete=models.CASCADE, db_index=False
     )
     size_ml = models.PositiveIntegerField()  # حجم الزجاجة بالملي
     price = models.DecimalField(max_digits=7, decimal_places=2)
@@ -63,29 +337,213 @@ class ProductVariant(models.Model):
     withbox = models.BooleanField(default=False)
     travelsize = models.BooleanField(default=False)
     caption = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    sales_total = models.PositiveIntegerField(default=0, editable=False)
+    sales_7d = models.PositiveIntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0, editable=False)
+
+    # السعر بعد الخصم ونسبة الخصم بتتحسب في الداتابيز نفسها
+    final_price = models.GeneratedField(
+        expression=F("price")
+        - Coalesce(F("discount"), Value(0), output_field=DecimalField()),
+        output_field=models.DecimalField(max_digits=7, decimal_places=2),
+        db_persist=True,
+    )
+    discount_pct = models.GeneratedField(
+        expression=Case(
+            When(
+                price__gt=0,
+                then=Least(
+                    # 100.0 عشان SQLite ما يعملش قسمة integer
+                    Coalesce(F("discount"), Value(0), output_field=DecimalField())
+                    * Value(100.0)
+                    / F("price"),
+                    Value(100),
+                    output_field=DecimalField(),
+                ),
+            ),
+            default=Value(0),
+            output_field=DecimalField(),
+        ),
+        output_field=models.DecimalField(max_digits=5, decimal_places=2),
+        db_persist=True,
+    )
+
+    objects = ProductVariantQuerySet.as_manager()
 
     class Meta:
         ordering = ["size_ml"]
+        indexes = [
+            models.Index(fields=["final_price"], name="variant_final_price_idx"),
+            models.Index(fields=["discount_pct"], name="variant_discount_pct_idx"),
+            # الـ prefetch بيجيب variants المنتجات مترتبة بالحجم
+            models.Index(
+                fields=["product", "size_ml"], name="variant_product_size_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.size_ml}ml"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # الداتابيز بتحسب القيم دي، فنمسحها عشان تتقري من جديد أول ما تتطلب
+        for field in ("final_price", "discount_pct"):
+            self.__dict__.pop(field, None)
+
+
+def refresh_price_summaries(product_ids):
+    """
+    يعيد حساب min/max final price وأكبر نسبة خصم وإجمالي المخزون
+    للمنتجات دي من الـ variants بتاعتها في query واحدة.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+
+    summaries = {
+        row["product_id"]: row
+        for row in ProductVariant.objects.filter(product_id__in=product_ids)
+        .values("product_id")
+        .annotate(
+            min_final_price=Min("final_price"),
+            max_final_price=Max("final_price"),
+            max_discount_pct=Max("discount_pct"),
+            total_stock=Sum("stock"),
+        )
+    }
+
+    now = timezone.now()
+    products = []
+    for product_id in product_ids:
+        summary = summaries.get(product_id, {})
+        products.append(
+            Product(
+                pk=product_id,
+                min_final_price=summary.get("min_final_price"),
+                max_final_price=summary.get("max_final_price"),
+                max_discount_pct=summary.get("max_discount_pct") or 0,
+                total_stock=summary.get("total_stock") or 0,
+                updated_at=now,
+            )
+        )
+    Product.objects.bulk_update(
+        products,
+        [
+            "min_final_price",
+            "max_final_price",
+            "max_discount_pct",
+            "total_stock",
+            "updated_at",
+        ],
+    )
+    # bulk_update مش بيبعت signals، فالكاش لازم يعرف من هنا
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def update_product_price_summary(sender, instance, **kwargs):
+    refresh_price_summaries([instance.product_id])
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(
         Product, related_name="images", on_delete=models.CASCADE
     )
     image = models.ImageField(upload_to="product_images/")
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
     alt_text = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Image for {self.product.name}"
 
 
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product_on_image_change(sender, instance, **kwargs):
+    # الصور جزء من الـ payload بتاع المنتج، فالـ delta feed لازم يشوف التعديل
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_products_on_category_change(sender, instance, **kwargs):
+    Product.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+class ProductTombstone(models.Model):
+    """أثر المنتج المحذوف عشان الـ delta feed (?since=) يبلغ عنه."""
+
+    product_id = models.BigIntegerField()
+    slug = models.SlugField(max_length=200)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Deleted product #{self.product_id} ({self.slug})"
+
+
+@receiver(post_delete, sender=Product)
+def record_product_tombstone(sender, instance, **kwargs):
+    ProductTombstone.objects.create(product_id=instance.pk, slug=instance.slug)
+
+
+class ProductRelation(models.Model):
+    """
+    "ناس اشتروا ده اشتروا كمان": أعلى K منتج بيتشروا مع المنتج ده، متحسبين
+    مسبقًا بـ manage.py build_related_products من الأوردرات القديمة.
+    """
+
+    product = models.ForeignKey(
+        Product, related_name="relations", on_delete=models.CASCADE
+    )
+    related = models.ForeignKey(Product, related_name="+", on_delete=models.CASCADE)
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["product", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "rank"], name="unique_product_relation_rank"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class DailySales(models.Model):
+    """الكمية المباعة من كل variant في اليوم، ومنها بتتحسب الـ 7 أيام والـ trending."""
+
+    variant = models.ForeignKey(
+        ProductVariant, related_name="daily_sales", on_delete=models.CASCADE
+    )
+    product = models.ForeignKey(
+        Product, related_name="daily_sales", on_delete=models.CASCADE
+    )
+    date = models.DateField(db_index=True)
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["variant", "date"], name="unique_daily_sales_variant_date"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variant_id} @ {self.date}: {self.quantity}"
+
+
 class OfferImage(models.Model):
     image = models.ImageField(
         upload_to="offers/slider/simple/", verbose_name="صورة العرض"
     )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Offer Images"
@@ -99,6 +557,8 @@ class ReviewsImage(models.Model):
     image = models.ImageField(
         upload_to="reviews/slider/simple/", verbose_name="صورة التقييم"
     )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Reviews Images"
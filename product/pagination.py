@@ -0,0 +1,202 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_right
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Field, Func, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def use_cursor_pagination(request):
+    """الـ cursor اختياري: ?pagination=cursor أو وجود ?cursor= في الرابط."""
+    return request.GET.get("pagination") == "cursor" or "cursor" in request.GET
+
+
+class RowValue(Func):
+    """(a, b) في الـ SQL، زي (priority, id) < (%s, %s)."""
+
+    function = ""
+    output_field = Field()
+
+
+class KeysetPagination:
+    """
+    Pagination بالـ keyset: الصفحة الجاية بتبدأ بعد آخر (مفتاح الترتيب, id)
+    بدل OFFSET، ومن غير COUNT، فالصفحة 500 بتتكلف زي الصفحة الأولى.
+    الـ cursor نفسه JSON متشفر base64 ومش مفروض الفرونت يفهمه.
+    """
+
+    page_size = 24
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request):
+        """queryset لازم يكون مترتب بحقل واحد + id، زي (-priority, -id)."""
+        self.request = request
+        field, descending = self._ordering(queryset)
+        cursor = self._decode_cursor(
+            request, order=f"{'-' if descending else ''}{field}"
+        )
+        model_field = queryset.model._meta.get_field(field)
+        if cursor is not None:
+            cursor["id"] = self._clean(queryset.model._meta.pk, cursor["id"])
+            if field != "id":
+                cursor["value"] = self._clean(model_field, cursor["value"])
+
+        page = self._page(queryset, model_field, descending, cursor)
+        self.next_cursor = None
+        if len(page) > self.page_size:
+            page = page[: self.page_size]
+            last = page[-1]
+            self.next_cursor = {
+                "order": f"{'-' if descending else ''}{field}",
+                "value": _json_value(getattr(last, field)),
+                "id": last.pk,
+            }
+        return page
+
+    def paginate_ranked(self, ranked_keys, request):
+        """
+        نفس الفكرة على قايمة مترتبة في الذاكرة (نتيجة البحث): كل عنصر
+        (score_key, product_id) والصفحة بتبدأ بـ bisect بعد آخر عنصر.
+        """
+        self.request = request
+        cursor = self._decode_cursor(request, order="rank")
+        start = 0
+        if cursor is not None:
+            if isinstance(cursor["value"], bool) or not isinstance(
+                cursor["value"], (int, float)
+            ):
+                raise NotFound(self.invalid_cursor_message)
+            start = bisect_right(ranked_keys, (cursor["value"], cursor["id"]))
+
+        page = ranked_keys[start : start + self.page_size + 1]
+        self.next_cursor = None
+        if len(page) > self.page_size:
+            page = page[: self.page_size]
+            value, last_id = page[-1]
+            self.next_cursor = {"order": "rank", "value": value, "id": last_id}
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        encoded = urlsafe_b64encode(
+            json.dumps(self.next_cursor, separators=(",", ":")).encode()
+        ).decode()
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, "pagination", "cursor")
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    # ---------------------------------------------------------------
+
+    def _decode_cursor(self, request, order):
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            if (
+                cursor["order"] != order
+                or "value" not in cursor
+                or isinstance(cursor["id"], bool)
+                or not isinstance(cursor["id"], int)
+            ):
+                raise ValueError
+            return cursor
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _clean(self, field, value):
+        """
+        قيمة الـ cursor بنوع الحقل وفي الـ range بتاعه (validators الـ
+        IntegerField)، عشان cursor متلعب فيه يرجع 404 مش 500 من الداتابيز.
+        """
+        if value is None:
+            return None
+        try:
+            value = field.to_python(value)
+            field.run_validators(value)
+        except (DjangoValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return value
+
+    @staticmethod
+    def _ordering(queryset):
+        """(الحقل, تنازلي؟) من ترتيب الـ queryset، والـ id دايمًا آخر مفتاح."""
+        ordering = [
+            key
+            for key in queryset.query.order_by
+            if key.lstrip("-") not in ("id", "pk")
+        ]
+        if len(ordering) > 1:
+            raise ValidationError("Cursor pagination supports one ordering field.")
+        if not ordering:
+            id_key = next(iter(queryset.query.order_by), "-id")
+            return "id", id_key.startswith("-")
+        return ordering[0].lstrip("-"), ordering[0].startswith("-")
+
+    def _page(self, queryset, field, descending, cursor):
+        """أول page_size + 1 صف بعد الـ cursor."""
+        limit = self.page_size + 1
+        pk = queryset.model._meta.pk
+        if field.primary_key:
+            after = None if cursor is None else (cursor["id"],)
+            return list(self._seek(queryset, [pk], descending, after)[:limit])
+
+        after = None if cursor is None else (cursor["value"], cursor["id"])
+        if not field.null:
+            return list(self._seek(queryset, [field, pk], descending, after)[:limit])
+
+        # الحقل الـ nullable (السعر): القيم الأول وبعدها الـ NULLs بالـ id. كل
+        # جزء seek لوحده، وجزء الـ NULLs بيتقرا بس لما الصفحة ما تكملش
+        in_nulls = cursor is not None and cursor["value"] is None
+        page = []
+        if not in_nulls:
+            values = queryset.filter(**{f"{field.name}__isnull": False})
+            page = list(self._seek(values, [field, pk], descending, after)[:limit])
+        if len(page) < limit:
+            nulls = queryset.filter(**{f"{field.name}__isnull": True})
+            after = (cursor["id"],) if in_nulls else None
+            page += self._seek(nulls, [pk], descending, after)[: limit - len(page)]
+        return page
+
+    @staticmethod
+    def _seek(queryset, fields, descending, after=None):
+        """
+        queryset مترتب بالحقول دي زي الـ index بالظبط، ولو after موجودة بيبدأ
+        بعدها. الشرط row value واحد زي (priority, id) < (%s, %s)، فالداتابيز
+        بتعمل seek على الـ index بدل ما تقرا الصفحات اللي فاتت.
+        """
+        names = [field.name for field in fields]
+        queryset = queryset.order_by(
+            *(f"-{name}" if descending else name for name in names)
+        )
+        if after is None:
+            return queryset
+        beyond = LessThan if descending else GreaterThan
+        return queryset.filter(
+            beyond(
+                RowValue(*(F(name) for name in names)),
+                RowValue(
+                    *(
+                        Value(value, output_field=field)
+                        for field, value in zip(fields, after)
+                    )
+                ),
+            )
+        )
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (int, str)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
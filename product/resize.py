@@ -0,0 +1,85 @@
+"""
+/media/resized/<w>x<h>/<path>: أول طلب بيقص ويصغر الصورة ويكتبها في
+MEDIA_ROOT/resized/<w>x<h>/<path>، فنفس الرابط بعد كده nginx بيخدمه من الديسك
+على طول (try_files $uri @django) ومن غير ما يوصل لـ Django.
+"""
+
+import mimetypes
+import os
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import locks
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.views.decorators.http import require_GET
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .images import DERIVATIVES_DIR, ORIGINAL_FORMATS, encode_image, open_image
+
+RESIZED_DIR = "resized"
+# اسم الملف مش بيتغير مع محتواه (الـ storage بيدي اسم جديد لكل رفع)
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _resize(source, target, width, height):
+    with open(source, "rb") as file:
+        image, image_format = open_image(file)
+    if image_format not in ORIGINAL_FORMATS:
+        raise Http404("Unsupported image format")
+    image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+
+    # ملف مؤقت وبعدين rename، فمحدش يقرا نص صورة
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(target))
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(encode_image(image, image_format))
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+@require_GET
+def resized_image(request, width, height, path):
+    if (width, height) not in settings.IMAGE_RESIZE_SIZES:
+        raise Http404("Size not allowed")
+    path = posixpath.normpath(path)
+    if path.split("/", 1)[0] in ("..", RESIZED_DIR, DERIVATIVES_DIR):
+        raise Http404
+    try:
+        source = safe_join(settings.MEDIA_ROOT, path)
+        target = safe_join(settings.MEDIA_ROOT, RESIZED_DIR, f"{width}x{height}", path)
+    except SuspiciousFileOperation:
+        raise Http404
+
+    if not os.path.exists(target):
+        if not os.path.isfile(source):
+            raise Http404
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # lock لكل ملف: الطلبات اللي جاية مع بعض بتستنى أول واحد يخلص
+        lock_path = f"{target}.lock"
+        with open(lock_path, "wb") as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                if not os.path.exists(target):
+                    _resize(source, target, width, height)
+            except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+                raise Http404("Could not resize image")
+            finally:
+                # الـ lock مالوش لازمة بعد كده (الطلبات الجاية بتلاقي الصورة)،
+                # ومن غير كده بيفضل جنب الصور في الفولدر اللي nginx بيخدمه.
+                # اللي مستنيين عليه بيشيكوا على الصورة تاني بعد ما ياخدوه
+                try:
+                    os.unlink(lock_path)
+                except FileNotFoundError:
+                    pass
+                locks.unlock(lock_file)
+
+    response = FileResponse(
+        open(target, "rb"), content_type=mimetypes.guess_type(target)[0]
+    )
+    response["Cache-Control"] = IMMUTABLE
+    return response
@@ -0,0 +1,137 @@
+"""
+عدادات المبيعات لترتيب "الأكثر مبيعًا" و"الترند": كل أوردر بيزود العدادات على
+المنتج والـ variant في نفس اللحظة (F() من غير ما نقرا الصف)، وبيسجل الكمية في
+DailySales. الـ 7 أيام والـ trending بيتحسبوا من الأول كل ليلة من DailySales
+(manage.py compact_sales)، وبين الليلة والتانية المبيعات الجديدة بتتزود عليهم
+زي ما هي لأن عمرها أقل من يوم.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import DailySales, Product, ProductVariant
+
+# كل 3 أيام وزن البيعة بيقل للنص
+TRENDING_HALF_LIFE_DAYS = 3
+# أقدم من كده وزنها أقل من 1% ومش بتفرق في الترتيب
+TRENDING_WINDOW_DAYS = 28
+RECENT_DAYS = 7
+
+
+def _increment(queryset, quantity):
+    return queryset.update_counters(
+        sales_total=F("sales_total") + quantity,
+        sales_7d=F("sales_7d") + quantity,
+        trending_score=F("trending_score") + quantity,
+    )
+
+
+def _add_daily(variant_id, product_id, day, quantity):
+    rows = DailySales.objects.filter(variant_id=variant_id, date=day)
+    if rows.update(quantity=F("quantity") + quantity):
+        return
+    try:
+        # savepoint عشان لو أوردر تاني سبقنا للصف ده الـ transaction الكبيرة تكمل
+        with transaction.atomic():
+            DailySales.objects.create(
+                variant_id=variant_id,
+                product_id=product_id,
+                date=day,
+                quantity=quantity,
+            )
+    except IntegrityError:
+        rows.update(quantity=F("quantity") + quantity)
+
+
+def record_sales(order):
+    """بيزود العدادات بكميات أصناف الأوردر، بعد ما الأصناف كلها تتحفظ."""
+    variants = defaultdict(int)
+    products = defaultdict(int)
+    variant_products = {}
+    items = order.orderitems.filter(
+        variant__isnull=False, product__isnull=False
+    ).values_list("variant_id", "product_id", "quantity")
+    for variant_id, product_id, quantity in items:
+        if quantity <= 0:
+            continue
+        variants[variant_id] += quantity
+        products[product_id] += quantity
+        variant_products[variant_id] = product_id
+
+    today = timezone.localdate()
+    with transaction.atomic():
+        # بالترتيب عشان أوردرين مع بعض ما يقفلوش نفس الصفوف بالعكس
+        for variant_id in sorted(variants):
+            quantity = variants[variant_id]
+            _increment(ProductVariant.objects.filter(pk=variant_id), quantity)
+            _add_daily(variant_id, variant_products[variant_id], today, quantity)
+        for product_id in sorted(products):
+            # Product.update مش بيلمس updated_at فالكاش والـ feed مش بيتأثروا
+            Product.objects.filter(pk=product_id).update(
+                sales_total=F("sales_total") + products[product_id],
+                sales_7d=F("sales_7d") + products[product_id],
+                trending_score=F("trending_score") + products[product_id],
+            )
+
+
+def _recent_counters(rows, today):
+    """{id: [sales_7d, trending_score]} من (id, date, quantity)."""
+    counters = defaultdict(lambda: [0, 0.0])
+    for object_id, day, quantity in rows:
+        age = (today - day).days
+        if age < RECENT_DAYS:
+            counters[object_id][0] += quantity
+        counters[object_id][1] += quantity * 0.5 ** (age / TRENDING_HALF_LIFE_DAYS)
+    return counters
+
+
+def _store_counters(model, counters, batch_size):
+    # _base_manager عشان update و bulk_update بتوع ProductVariant بيعملوا
+    # updated_at وملخص أسعار، والعدادات مالهاش دعوة بالكتالوج
+    manager = model._base_manager
+    # اللي ما اتباعش في الفترة دي بيرجع صفر
+    manager.exclude(pk__in=list(counters)).exclude(sales_7d=0, trending_score=0).update(
+        sales_7d=0, trending_score=0
+    )
+
+    objects = [
+        model(pk=object_id, sales_7d=recent, trending_score=score)
+        for object_id, (recent, score) in counters.items()
+    ]
+    manager.bulk_update(objects, ["sales_7d", "trending_score"], batch_size=batch_size)
+    return len(objects)
+
+
+def compact_sales(keep_days=None, batch_size=500):
+    """
+    بيعيد حساب sales_7d و trending_score من DailySales لحد النهارده، ولو
+    keep_days متحدد بيمسح الأيام الأقدم منه. بيرجع (عدد المنتجات, عدد الصفوف
+    اللي اتمسحت).
+    """
+    today = timezone.localdate()
+    window = DailySales.objects.filter(
+        date__gt=today - timedelta(days=TRENDING_WINDOW_DAYS)
+    )
+    with transaction.atomic():
+        variants = _recent_counters(
+            window.values_list("variant_id", "date", "quantity").iterator(), today
+        )
+        products = _recent_counters(
+            window.values_list("product_id", "date", "quantity").iterator(), today
+        )
+        _store_counters(ProductVariant, variants, batch_size)
+        updated = _store_counters(Product, products, batch_size)
+        # ترتيب bestseller و trending اتغير، فالـ ETag لازم يتغير
+        transaction.on_commit(bump_catalog_version)
+
+    deleted = 0
+    if keep_days is not None:
+        deleted, _ = DailySales.objects.filter(
+            date__lte=today - timedelta(days=keep_days)
+        ).delete()
+    return updated, deleted
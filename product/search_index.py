@@ -0,0 +1,587 @@
+"""
+فهرس بحث في الذاكرة (inverted index) على اسم المنتج والبراند والقسم.
+
+كل worker بيبني الفهرس مرة واحدة وبيحدثه مع signals بتاعة Product و
+ProductVariant و Category، فالبحث بيرجع ids مترتبة من غير ما يكلم الداتابيز.
+الـ workers التانية بتعيد البناء في الخلفية لما الفهرس يعدي SEARCH_INDEX_TTL
+ثانية، والبحث بيفضل شغال على الفهرس القديم لحد ما الجديد يخلص.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from heapq import nlargest
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Brand, Product, ProductVariant, Category, brand_slug
+
+# وزن كل حقل في الترتيب
+FIELD_WEIGHTS = {"name": 3.0, "brand": 2.0, "category": 1.0}
+# معامل نوع التطابق
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+MAX_SUGGESTIONS = 10
+# أطول prefix بتتخزن نتيجة اقتراحاته، والأطول بيتحسب كل مرة (range صغير)
+CACHED_PREFIX_LENGTH = 3
+# حقول الـ doc اللي الاقتراحات مبنية عليها، تغيير غيرها (سعر، مخزون) ما بيبنيهاش
+SUGGESTION_FIELDS = ("name", "slug", "brand", "category", "category_slug")
+
+logger = logging.getLogger(__name__)
+
+# الحقول اللي الفهرس محتاجها من كل منتج
+DOC_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "brand",
+    "category_id",
+    "category__name",
+    "category__slug",
+    "min_final_price",
+    "total_stock",
+)
+
+ARABIC_FOLDING = str.maketrans({"ٱ": "ا", "ى": "ي", "ة": "ه", "ـ": None})
+TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """
+    توحيد النص للبحث: حروف صغيرة ومن غير تشكيل أو accents،
+    وأشكال الألف والياء والتاء المربوطة بتتحول لشكل واحد.
+    """
+    # NFKD بيفصل الهمزة عن الألف/الواو/الياء وبيفصل الـ accents،
+    # وبعدها بنشيل كل الـ combining marks (ومعاها التشكيل العربي)
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.translate(ARABIC_FOLDING)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text or ""))
+
+
+def _load_rows(product_ids=None):
+    """صفوف المنتجات للفهرس ومعاها أحجام الـ variants (query واحدة لكل جدول)."""
+    products = Product.objects.all()
+    variants = ProductVariant.objects.order_by()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+        variants = variants.filter(product_id__in=product_ids)
+
+    sizes = {}
+    for product_id, size_ml in variants.values_list("product_id", "size_ml").iterator(
+        chunk_size=5000
+    ):
+        sizes.setdefault(product_id, set()).add(size_ml)
+
+    for row in products.values(*DOC_FIELDS).iterator(chunk_size=2000):
+        row["sizes"] = sizes.get(row["id"], ())
+        yield row
+
+
+FACETS = ("brand", "category", "size_ml", "price", "in_stock")
+FACET_ORDER = {
+    "brand": lambda item: (-item["count"], item["value"]),
+    "category": lambda item: (-item["count"], item["value"]),
+    "size_ml": lambda item: item["value"],
+    "price": lambda item: int(item["value"].split("-")[0].rstrip("+")),
+    "in_stock": lambda item: not item["value"],
+}
+
+
+def _facet_values(row):
+    values = [("brand", row["brand"]), ("in_stock", row["total_stock"] > 0)]
+    if row["category__slug"]:
+        values.append(("category", row["category__slug"]))
+    bucket = price_bucket(row["min_final_price"])
+    if bucket:
+        values.append(("price", bucket))
+    values.extend(("size_ml", size) for size in row["sizes"])
+    return values
+
+
+def price_bucket(price):
+    """الـ bucket بتاع السعر من PRICE_FACET_BUCKETS، زي "500-1000" أو "5000+"."""
+    if price is None:
+        return None
+    edges = settings.PRICE_FACET_BUCKETS
+    for low, high in zip(edges, edges[1:]):
+        if price < high:
+            return f"{low}-{high}"
+    return f"{edges[-1]}+"
+
+
+def _word_starts(text):
+    """النص المتوحد بداية من كل كلمة فيه: "a b c" -> "a b c", "b c", "c"."""
+    tokens = tokenize(text)
+    return [" ".join(tokens[i:]) for i in range(len(tokens))]
+
+
+def _suggestion_key(doc):
+    if doc is None:
+        return None
+    return tuple(doc[field] for field in SUGGESTION_FIELDS)
+
+
+def _deletes(token):
+    """كل الكلمات اللي بتطلع من حذف حرف واحد (للبحث بخطأ حرف واحد)."""
+    return {token[:i] + token[i + 1 :] for i in range(len(token))}
+
+
+class SearchIndex:
+    # الحالة اللي build بيبنيها من الأول في object جديد وبيبدلها مرة واحدة
+    STATE = (
+        "postings",
+        "docs",
+        "_deletions",
+        "_vocabulary",
+        "_vocabulary_dirty",
+        "_suggestions",
+        "_suggestion_cache",
+        "_facets",
+    )
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built_at = None
+        self._refreshing = False
+        # المنتجات اللي اتغيرت أثناء build، بتتعمل reindex بعد التبديل
+        self._pending = None
+        # بيزيد مع كل تبديل للاقتراحات، فالبناء الأقدم ما يكتبش على الأحدث
+        self._suggestions_generation = 0
+        self._clear()
+
+    def _clear(self):
+        self.postings = {}  # token -> {product_id: weight}
+        self.docs = {}  # product_id -> بيانات المنتج للفلترة + التوكنز بتاعته
+        self._deletions = {}  # الكلمة بعد حذف حرف منها -> tokens
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self._suggestions, self._suggestion_cache = self._prepare_suggestions({})
+        self._facets = {}  # facet -> {value: set(product_ids)}
+
+    # ---------------------------------------------------------------
+    # البناء والتحديث
+    # ---------------------------------------------------------------
+
+    def build(self):
+        """
+        بيبني فهرس جديد بره الـ lock وبيبدله بالقديم مرة واحدة، فالبحث بيفضل
+        شغال على القديم طول البناء.
+        """
+        with self._build_lock:
+            with self._lock:
+                self._pending = set()
+            try:
+                fresh = SearchIndex()
+                for row in _load_rows():
+                    fresh._add(row)
+                suggestions = self._prepare_suggestions(fresh.docs)
+                fresh._suggestions, fresh._suggestion_cache = suggestions
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                for name in self.STATE:
+                    setattr(self, name, getattr(fresh, name))
+                pending, self._pending = self._pending, None
+                self._suggestions_generation += 1
+                self._built_at = time.monotonic()
+        if pending:
+            self.reindex(list(pending))
+
+    def ensure_built(self):
+        if self._built_at is None:
+            # أول مرة مفيش فهرس نرجع له، فالـ request بيستنى البناء
+            with self._build_lock:
+                built = self._built_at is not None
+            if not built:
+                self.build()
+            return
+
+        ttl = getattr(settings, "SEARCH_INDEX_TTL", 300)
+        if time.monotonic() - self._built_at <= ttl:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh, name="search-index-refresh", daemon=True
+        ).start()
+
+    def _refresh(self):
+        try:
+            self.build()
+        except Exception:
+            logger.warning("Search index refresh failed", exc_info=True)
+        finally:
+            self._refreshing = False
+            # connection الـ thread ده بس
+            connections.close_all()
+
+    def reindex(self, product_ids):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.update(product_ids)
+        if self._built_at is None:
+            return
+        rows = list(_load_rows(product_ids))
+        with self._lock:
+            before = {
+                product_id: _suggestion_key(self.docs.get(product_id))
+                for product_id in product_ids
+            }
+            for product_id in product_ids:
+                self._remove(product_id)
+            for row in rows:
+                self._add(row)
+            changed = any(
+                _suggestion_key(self.docs.get(product_id)) != key
+                for product_id, key in before.items()
+            )
+        if changed:
+            self._update_suggestions()
+
+    def remove(self, product_id):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.add(product_id)
+            removed = self._remove(product_id)
+        if removed:
+            self._update_suggestions()
+
+    def _update_suggestions(self):
+        """
+        بيبني الاقتراحات من نسخة من الـ docs بره الـ lock وبيبدلها، فالبحث
+        والـ typeahead ما بيستنوش البناء.
+        """
+        with self._lock:
+            self._suggestions_generation += 1
+            generation = self._suggestions_generation
+            # الـ docs نفسها مش بتتعدل (_add بيحط dict جديد)، فنسخة سطحية كفاية
+            docs = dict(self.docs)
+        suggestions = self._prepare_suggestions(docs)
+        with self._lock:
+            # لو فيه تعديل أو build أحدث بدأ، هو اللي هيبدل
+            if generation == self._suggestions_generation:
+                self._suggestions, self._suggestion_cache = suggestions
+
+    def product_ids_in_category(self, category_id):
+        return [
+            product_id
+            for product_id, doc in self.docs.items()
+            if doc["category_id"] == category_id
+        ]
+
+    def _add(self, row):
+        product_id = row["id"]
+        weights = {}
+        for field, text in (
+            ("name", row["name"]),
+            ("brand", row["brand"]),
+            ("category", row["category__name"]),
+        ):
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0), FIELD_WEIGHTS[field])
+
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                for deletion in _deletes(token):
+                    self._deletions.setdefault(deletion, set()).add(token)
+                self._vocabulary_dirty = True
+            self.postings[token][product_id] = weight
+
+        self.docs[product_id] = {
+            "name": row["name"],
+            "slug": row["slug"],
+            "brand": row["brand"],
+            "brand_slug": brand_slug(row["brand"]),
+            "category_id": row["category_id"],
+            "category": row["category__name"],
+            "category_slug": row["category__slug"],
+            "min_final_price": row["min_final_price"],
+            "tokens": tuple(weights),
+            "facets": _facet_values(row),
+        }
+        for facet, value in self.docs[product_id]["facets"]:
+            self._facets.setdefault(facet, {}).setdefault(value, set()).add(product_id)
+
+    def _remove(self, product_id):
+        doc = self.docs.pop(product_id, None)
+        if doc is None:
+            return None
+        for facet, value in doc["facets"]:
+            self._facets[facet][value].discard(product_id)
+        for token in doc["tokens"]:
+            postings = self.postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self.postings[token]
+                for deletion in _deletes(token):
+                    self._deletions[deletion].discard(token)
+                self._vocabulary_dirty = True
+        return doc
+
+    # ---------------------------------------------------------------
+    # البحث
+    # ---------------------------------------------------------------
+
+    def search(self, query, **filters):
+        """
+        ترجع ids المنتجات مترتبة حسب الأهمية. كل كلمة في البحث لازم تتطابق
+        (كاملة أو كبداية كلمة أو بخطأ حرف واحد).
+        """
+        return [-negative_id for _, negative_id in self.rank(query, **filters)]
+
+    def rank(self, query, brands=None, categories=None, min_price=None, max_price=None):
+        """
+        نفس search بس بترجع مفاتيح الترتيب (-score, -product_id) مترتبة تصاعدي،
+        وده اللي الـ cursor pagination بيعمل عليه bisect.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if brands:
+            brands = {brand_slug(brand) for brand in brands}
+
+        self.ensure_built()
+        with self._lock:
+            scores = None
+            for term in terms:
+                term_scores = self._match(term)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        product_id: score + term_scores[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in term_scores
+                    }
+                if not scores:
+                    return []
+
+            results = [
+                (-score, -product_id)
+                for product_id, score in scores.items()
+                if self._passes(
+                    self.docs[product_id], brands, categories, min_price, max_price
+                )
+            ]
+
+        results.sort()
+        return results
+
+    def _match(self, term):
+        scores = {}
+
+        def add(token, factor):
+            for product_id, weight in self.postings[token].items():
+                score = weight * factor
+                if score > scores.get(product_id, 0):
+                    scores[product_id] = score
+
+        if term in self.postings:
+            add(term, EXACT)
+        for token in self._tokens_with_prefix(term):
+            if token != term:
+                add(token, PREFIX)
+        if len(term) >= 4:
+            for token in self._fuzzy_tokens(term):
+                add(token, FUZZY)
+        return scores
+
+    def _tokens_with_prefix(self, prefix):
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_dirty = False
+        vocabulary = self._vocabulary
+        for position in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            token = vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def _fuzzy_tokens(self, term):
+        # حذف حرف من الكلمة أو من كلمة الفهرس بيغطي الاستبدال والزيادة والنقص
+        candidates = set(self._deletions.get(term, ()))
+        for deletion in _deletes(term):
+            if deletion in self.postings:
+                candidates.add(deletion)
+            candidates |= self._deletions.get(deletion, set())
+        candidates.discard(term)
+        return candidates
+
+    # ---------------------------------------------------------------
+    # الـ facets
+    # ---------------------------------------------------------------
+
+    def facet_counts(self, product_ids):
+        """
+        عدد المنتجات لكل براند وقسم وحجم و bucket سعر ومتاح/مش متاح،
+        جوه مجموعة المنتجات دي (نتيجة الفلتر أو البحث الحالي).
+        """
+        matching = set(product_ids)
+        self.ensure_built()
+        with self._lock:
+            counts = {}
+            for facet in FACETS:
+                # set & بيمشي على المجموعة الأصغر، فده زي AND على bitmaps
+                counts[facet] = [
+                    {"value": value, "count": len(ids & matching)}
+                    for value, ids in self._facets.get(facet, {}).items()
+                    if not ids.isdisjoint(matching)
+                ]
+
+        for facet, order in FACET_ORDER.items():
+            counts[facet].sort(key=order)
+        return counts
+
+    # ---------------------------------------------------------------
+    # الاقتراحات وهو بيكتب (typeahead)
+    # ---------------------------------------------------------------
+
+    def suggest(self, prefix, limit=5):
+        """
+        أعلى limit اسم منتج وبراند وقسم بيبدأ فيهم أي كلمة بالـ prefix ده.
+        المصفوفات بتتبني مع build و reindex فالبحث فيها bisect بس، ونتيجة
+        الـ prefixes القصيرة بتتخزن لحد ما المنتجات تتغير.
+        """
+        key = " ".join(tokenize(prefix))
+        if not key:
+            return {"products": [], "brands": [], "categories": []}
+
+        self.ensure_built()
+        with self._lock:
+            top = self._cached_top(key)
+
+        return {kind: entries[:limit] for kind, entries in top.items()}
+
+    def _cached_top(self, key):
+        top = self._suggestion_cache.get(key)
+        if top is None:
+            top = self._top(self._suggestions, key)
+            # الـ prefixes القصيرة بس هي اللي الـ range بتاعها كبير ويستاهل
+            # يتخزن، واللي ليها نتايج بس، فالكاش ما يكبرش بأي prefix بيتبعت
+            if len(key) <= CACHED_PREFIX_LENGTH and any(top.values()):
+                self._suggestion_cache[key] = top
+        return top
+
+    @classmethod
+    def _prepare_suggestions(cls, docs):
+        """(المصفوفات, الكاش) للـ docs دي. بيتنادى بره الـ lock."""
+        suggestions = cls._build_suggestions(docs)
+        # أول حرف هو أكبر range، فبنحسبه مرة واحدة مع البناء
+        first_letters = {key[0] for keys, _ in suggestions.values() for key in keys}
+        cache = {letter: cls._top(suggestions, letter) for letter in first_letters}
+        return suggestions, cache
+
+    @classmethod
+    def _top(cls, suggestions, key):
+        return {
+            kind: cls._top_entries(keys, entries, key, MAX_SUGGESTIONS)
+            for kind, (keys, entries) in suggestions.items()
+        }
+
+    @staticmethod
+    def _build_suggestions(docs):
+        """
+        لكل نوع مصفوفة keys مترتبة وجنبها (score, id, payload).
+        كل اسم بيتسجل مرة لكل كلمة فيه عشان "elixir" تلاقي "Sauvage Elixir".
+        """
+        entries = {"products": [], "brands": [], "categories": []}
+        brands = {}
+        categories = {}
+
+        for product_id, doc in docs.items():
+            payload = {"name": doc["name"], "slug": doc["slug"]}
+            for position, key in enumerate(_word_starts(doc["name"])):
+                # التطابق من أول الاسم أهم من كلمة في النص
+                score = (0 if position else 1, -len(doc["name"]))
+                entries["products"].append((key, (score, product_id, payload)))
+            if doc["brand"]:
+                brands.setdefault(doc["brand"], []).append(product_id)
+            if doc["category"]:
+                category = (doc["category"], doc["category_slug"])
+                categories.setdefault(category, []).append(product_id)
+
+        for brand, product_ids in brands.items():
+            for key in _word_starts(brand):
+                entries["brands"].append((key, ((len(product_ids),), brand, brand)))
+        for (name, slug), product_ids in categories.items():
+            payload = {"name": name, "slug": slug}
+            for key in _word_starts(name):
+                entries["categories"].append(
+                    (key, ((len(product_ids),), slug, payload))
+                )
+
+        suggestions = {}
+        for kind, items in entries.items():
+            items.sort(key=lambda item: item[0])
+            suggestions[kind] = ([key for key, _ in items], [e for _, e in items])
+        return suggestions
+
+    @staticmethod
+    def _top_entries(keys, entries, key, limit):
+        start = bisect_left(keys, key)
+        end = bisect_left(keys, key + "\U0010ffff", start)
+        best = {}
+        for score, identity, payload in entries[start:end]:
+            if identity not in best or score > best[identity][0]:
+                best[identity] = (score, payload)
+        top = nlargest(limit, best.values(), key=lambda item: item[0])
+        return [payload for _, payload in top]
+
+    @staticmethod
+    def _passes(doc, brands, categories, min_price, max_price):
+        if brands and doc["brand_slug"] not in brands:
+            return False
+        if categories and doc["category"] not in categories:
+            return False
+        price = doc["min_final_price"]
+        if min_price is not None and (price is None or price < min_price):
+            return False
+        if max_price is not None and (price is None or price > max_price):
+            return False
+        return True
+
+
+index = SearchIndex()
+
+
+@receiver(post_save, sender=Product)
+def reindex_product(sender, instance, **kwargs):
+    index.reindex([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def remove_product(sender, instance, **kwargs):
+    index.remove(instance.pk)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def reindex_variant_product(sender, instance, **kwargs):
+    # السعر المتخزن على المنتج بيتغير مع الـ variants
+    index.reindex([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reindex_category_products(sender, instance, **kwargs):
+    index.reindex(index.product_ids_in_category(instance.pk))
+
+
+@receiver(post_save, sender=Brand)
+def reindex_brand_products(sender, instance, **kwargs):
+    index.reindex(list(instance.products.values_list("id", flat=True)))
@@ -1,16 +1,29 @@
 from rest_framework import serializers
 from .models import Product, ProductImage, ProductVariant, OfferImage, ReviewsImage
-from decimal import Decimal, ROUND_DOWN
+from .images import srcset
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class SrcsetMixin(serializers.Serializer):
+    """روابط نسخ الصورة المتصغرة WebP/JPEG بصيغة srcset."""
+
+    srcset = serializers.SerializerMethodField()
+
+    def get_srcset(self, obj):
+        request = self.context.get("request")
+        build_url = request.build_absolute_uri if request is not None else None
+        return srcset(obj.image, obj.image_width, build_url)
+
+
+class ProductImageSerializer(SrcsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ProductImage
-        fields = ["id", "image", "alt_text"]
+        fields = ["id", "image", "alt_text", "srcset"]
 
 
 class ProductVariantSerializer(serializers.ModelSerializer):
-    final_price = serializers.SerializerMethodField()
+    final_price = serializers.DecimalField(
+        max_digits=7, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = ProductVariant
@@ -26,13 +39,6 @@ class ProductVariantSerializer(serializers.ModelSerializer):
             "caption",
         ]
 
-    def get_final_price(self, obj):
-        if obj.discount:
-            price = Decimal(obj.price) - Decimal(obj.discount)
-        else:
-            price = Decimal(obj.price)
-        return format(price.quantize(Decimal("0.00"), rounding=ROUND_DOWN), "f")
-
 
 class ProductSerializer(serializers.ModelSerializer):
     category = serializers.StringRelatedField()
@@ -59,31 +65,34 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
     def get_min_price(self, obj):
-        if not obj.variants.exists():
+        if obj.min_final_price is None:
             return None
-        prices = [
-            float(variant.price) - float(variant.discount or 0)
-            for variant in obj.variants.all()
-        ]
-        return round(min(prices), 2)
+        return round(float(obj.min_final_price), 2)
 
     def get_max_price(self, obj):
-        if not obj.variants.exists():
+        if obj.max_final_price is None:
             return None
-        prices = [
-            float(variant.price) - float(variant.discount or 0)
-            for variant in obj.variants.all()
-        ]
-        return round(max(prices), 2)
+        return round(float(obj.max_final_price), 2)
 
 
-class OfferImageSerializer(serializers.ModelSerializer):
+class OfferImageSerializer(SrcsetMixin, serializers.ModelSerializer):
     class Meta:
         model = OfferImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "srcset"]
 
 
-class ReviewsImageSerializer(serializers.ModelSerializer):
+class ReviewsImageSerializer(SrcsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ReviewsImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "srcset"]
+
+
+class PriceRangeSerializer(serializers.Serializer):
+    """?min_price و ?max_price للبحث، والقيمة الغلط بترجع 400 مش 500."""
+
+    min_price = serializers.DecimalField(
+        max_digits=None, decimal_places=None, required=False
+    )
+    max_price = serializers.DecimalField(
+        max_digits=None, decimal_places=None, required=False
+    )
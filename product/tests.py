@@ -1,3 +1,1236 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from order.models import Order, OrderItem
+
+from .cache import bump_catalog_version, cache_stats, catalog_version, get_cache
+from .fast_serializers import serialize_products
+from .images import generate_derivatives
+from .management.commands.explain_hot_queries import sequential_scans
+from .models import (
+    Brand,
+    Category,
+    DailySales,
+    OfferImage,
+    Product,
+    ProductImage,
+    ProductRelation,
+    ProductTombstone,
+    ProductVariant,
+    ReviewsImage,
+    refresh_price_summaries,
+)
+from .sales import record_sales
+from . import search_index as search_index_module
+from .pagination import KeysetPagination
+from .search_index import SearchIndex, index as search_index, normalize
+from .serializers import ProductSerializer
+from .utils import with_listing_data
+
+
+def create_product(index, category=None, discount=None):
+    product = Product.objects.create(
+        name=f"Perfume {index}",
+        slug=f"perfume-{index}",
+        brand=f"Brand {index % 3}",
+        description="Eau de parfum",
+        category=category,
+    )
+    for size, price in ((30, "300.00"), (100, "750.00")):
+        ProductVariant.objects.create(
+            product=product,
+            size_ml=size,
+            price=Decimal(price),
+            stock=5,
+            discount=discount,
+        )
+    ProductImage.objects.create(product=product, image=f"product_images/{index}.jpg")
+    ProductImage.objects.create(product=product, image=f"product_images/{index}b.jpg")
+    return product
+
+
+class ProductListingQueriesTest(TestCase):
+    """عدد الـ queries لازم يفضل ثابت مهما زاد عدد المنتجات في الصفحة."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Men")
+        search_index.build()
+        get_cache().clear()
+
+    def seed(self, count, discount=None):
+        for index in range(Product.objects.count(), count):
+            create_product(index, self.category, discount)
+
+    def count_queries(self, url, budget=4):
+        with self.assertNumQueries(budget) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_all_products_query_count_is_flat(self):
+        self.seed(3)
+        small = self.count_queries("/api/products/")
+        self.seed(24)
+        self.assertEqual(small, self.count_queries("/api/products/"))
+
+    def test_search_query_count_is_flat(self):
+        self.seed(3)
+        # فهرس البحث في الذاكرة: الداتابيز بس لتحميل الصفحة
+        small = self.count_queries("/api/search/perfume/", budget=3)
+        self.seed(24)
+        self.assertEqual(small, self.count_queries("/api/search/perfume/", budget=3))
+
+    def test_flash_sale_query_count_is_flat(self):
+        self.seed(3, discount=Decimal("60.00"))
+        small = self.count_queries("/api/sales/")
+        self.seed(10, discount=Decimal("60.00"))
+        self.assertEqual(small, self.count_queries("/api/sales/"))
+
+    def test_latest_and_swiper_query_counts(self):
+        self.seed(12, discount=Decimal("60.00"))
+        with self.assertNumQueries(3):
+            self.client.get("/api/products/swiper/")
+        # ترتيب الـ flash sale متخزن على المنتج: صفحة + صور + variants
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/sales/swiper/")
+        self.assertEqual(len(response.json()), 5)
+
+    def test_flash_sale_ranking(self):
+        self.seed(4)
+        bigger, smaller, tied = Product.objects.order_by("id")[:3]
+        bigger.variants.update(discount=Decimal("150.00"))  # 50%
+        smaller.variants.filter(size_ml=30).update(discount=Decimal("30.00"))
+        tied.variants.filter(size_ml=30).update(discount=Decimal("30.00"))
+        expected = [bigger.slug, tied.slug, smaller.slug]
+        response = self.client.get("/api/sales/swiper/").json()
+        self.assertEqual([product["slug"] for product in response], expected)
+
+        slugs, url = [], "/api/sales/?pagination=cursor"
+        while url:
+            page = self.client.get(url).json()
+            slugs += [product["slug"] for product in page["results"]]
+            url = page["next"]
+        self.assertEqual(slugs, expected)
+
+    def test_cursor_pagination_walks_every_product_without_count(self):
+        self.seed(30)
+        for url in (
+            "/api/products/?pagination=cursor",
+            "/api/products/?pagination=cursor&ordering=-price",
+        ):
+            seen = []
+            while url:
+                # من غير COUNT: صفحة + صور + variants، وآخر صفحة بالسعر فيها
+                # query كمان لجزء المنتجات اللي من غير سعر
+                with CaptureQueriesContext(connection) as context:
+                    page = self.client.get(url).json()
+                last_page = page["next"] is None and "price" in url
+                self.assertEqual(len(context.captured_queries), 4 if last_page else 3)
+                self.assertFalse(
+                    any("COUNT(" in query["sql"] for query in context.captured_queries)
+                )
+                seen += [product["slug"] for product in page["results"]]
+                url = page["next"]
+            self.assertEqual(len(seen), 30)
+            self.assertEqual(len(set(seen)), 30)
+
+        slugs = []
+        url = "/api/search/perfume/?pagination=cursor"
+        while url:
+            page = self.client.get(url).json()
+            slugs += [product["slug"] for product in page["results"]]
+            url = page["next"]
+        self.assertEqual(slugs, [f"perfume-{index}" for index in range(29, -1, -1)])
+        response = self.client.get("/api/products/?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+    def test_price_cursor_puts_products_without_price_last(self):
+        self.seed(30)
+        # من غير variants فمن غير سعر
+        unpriced = {
+            Product.objects.create(
+                name=f"Draft {index}", slug=f"draft-{index}", brand="X"
+            ).slug
+            for index in range(20)
+        }
+        for ordering in ("price", "-price"):
+            with self.subTest(ordering):
+                products, url = (
+                    [],
+                    f"/api/products/?pagination=cursor&ordering={ordering}",
+                )
+                while url:
+                    page = self.client.get(url).json()
+                    products += page["results"]
+                    url = page["next"]
+                slugs = [product["slug"] for product in products]
+                self.assertEqual(len(set(slugs)), 50)
+                self.assertEqual(set(slugs[30:]), unpriced)
+                prices = [product["min_price"] for product in products[:30]]
+                self.assertEqual(prices, sorted(prices, reverse=ordering == "-price"))
+
+    def test_deep_cursor_seeks_the_index(self):
+        self.seed(3)
+        pk = Product._meta.pk
+        for name, value in (
+            ("priority", 1),
+            ("sales_total", 1),
+            ("trending_score", 1.0),
+            ("max_discount_pct", Decimal("10")),
+            ("min_final_price", Decimal("100")),
+        ):
+            field = Product._meta.get_field(name)
+            queryset = Product.objects.filter(**{f"{name}__isnull": False})
+            page = KeysetPagination._seek(queryset, [field, pk], True, (value, 2))
+            plan = page[:25].explain()
+            with self.subTest(name):
+                self.assertEqual(sequential_scans(plan), [])
+                if connection.vendor == "sqlite":
+                    # SEARCH يعني بيبدأ من مكان الـ cursor في الـ index مش من أوله
+                    self.assertIn("SEARCH product_product USING INDEX", plan)
+
+    def test_tampered_cursor_values_are_not_found(self):
+        def encode(cursor):
+            return urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+        tampered = [
+            ("/api/products/", {"order": "-priority", "value": "x", "id": 1}),
+            ("/api/products/", {"order": "-priority", "value": 10**30, "id": 1}),
+            ("/api/products/", {"order": "-priority", "value": 1, "id": 10**30}),
+            (
+                "/api/products/?ordering=price",
+                {"order": "min_final_price", "value": "x", "id": 1},
+            ),
+            (
+                "/api/products/?ordering=created_at",
+                {"order": "created_at", "value": [], "id": 1},
+            ),
+            ("/api/search/perfume/", {"order": "rank", "value": "x", "id": 1}),
+            ("/api/search/perfume/", {"order": "rank", "value": True, "id": 1}),
+            ("/api/search/perfume/", {"order": "rank", "id": 1}),
+        ]
+        for url, cursor in tampered:
+            with self.subTest(url, cursor=cursor):
+                separator = "&" if "?" in url else "?"
+                response = self.client.get(f"{url}{separator}cursor={encode(cursor)}")
+                self.assertEqual(response.status_code, 404)
+
+    def test_prices_come_from_variants(self):
+        create_product(1, self.category, discount=Decimal("50.00"))
+        product = self.client.get("/api/product/perfume-1/").json()
+        self.assertEqual(product["min_price"], 250.0)
+        self.assertEqual(product["max_price"], 700.0)
+        self.assertEqual(product["category"], "Men")
+        self.assertEqual(len(product["images"]), 2)
+        self.assertEqual(
+            [variant["final_price"] for variant in product["variants"]],
+            ["250.00", "700.00"],
+        )
+
+
+class PriceSummaryTest(TestCase):
+    """ملخص الأسعار على المنتج لازم يفضل متزامن مع الـ variants."""
+
+    def setUp(self):
+        self.product = create_product(1, discount=Decimal("30.00"))
+
+    def assertSummary(self, min_price, max_price, discount_pct, stock):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.min_final_price, Decimal(min_price))
+        self.assertEqual(self.product.max_final_price, Decimal(max_price))
+        self.assertEqual(self.product.max_discount_pct, Decimal(discount_pct))
+        self.assertEqual(self.product.total_stock, stock)
+
+    def test_save_and_delete(self):
+        self.assertSummary("270.00", "720.00", "10.00", 10)
+        variant = self.product.variants.get(size_ml=100)
+        variant.discount = None
+        variant.save()
+        self.assertSummary("270.00", "750.00", "10.00", 10)
+        self.product.variants.get(size_ml=30).delete()
+        self.assertSummary("750.00", "750.00", "0.00", 5)
+
+    def test_queryset_update_and_bulk_operations(self):
+        self.product.variants.update(discount=None, stock=1)
+        self.assertSummary("300.00", "750.00", "0.00", 2)
+        ProductVariant.objects.bulk_create(
+            [ProductVariant(product=self.product, size_ml=10, price=Decimal("90.00"))]
+        )
+        self.assertSummary("90.00", "750.00", "0.00", 2)
+        variants = list(self.product.variants.all())
+        for variant in variants:
+            variant.discount = variant.price / 2
+        ProductVariant.objects.bulk_update(variants, ["discount"])
+        self.assertSummary("45.00", "375.00", "50.00", 2)
+
+    def test_price_filter_and_ordering(self):
+        create_product(2)
+        client = APIClient()
+        response = client.get("/api/products/?max_price=280").json()
+        self.assertEqual([p["slug"] for p in response["results"]], ["perfume-1"])
+        response = client.get("/api/products/?ordering=-price").json()
+        self.assertEqual(
+            [p["slug"] for p in response["results"]], ["perfume-2", "perfume-1"]
+        )
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="عطور رجالي", slug="men")
+        self.sauvage = Product.objects.create(
+            name="Sauvage Élixir", slug="sauvage", brand="Dior", category=self.category
+        )
+        self.oud = Product.objects.create(
+            name="عُود الأميرة", slug="oud", brand="Lattafa"
+        )
+        search_index.build()
+
+    def test_normalization(self):
+        self.assertEqual(normalize("Élixir"), "elixir")
+        self.assertEqual(normalize("أَمِيرَة"), normalize("اميره"))
+        self.assertEqual(normalize("إيمان"), "ايمان")
+        self.assertEqual(normalize("مستشفى"), "مستشفي")
+
+    def test_exact_prefix_and_fuzzy(self):
+        self.assertEqual(search_index.search("elixir"), [self.sauvage.pk])
+        self.assertEqual(search_index.search("sauv di"), [self.sauvage.pk])
+        self.assertEqual(search_index.search("savage"), [self.sauvage.pk])
+        self.assertEqual(search_index.search("الاميره"), [self.oud.pk])
+        self.assertEqual(search_index.search("رجالى"), [self.sauvage.pk])
+        self.assertEqual(search_index.search("chanel"), [])
+
+    def test_signals_keep_index_in_sync(self):
+        self.oud.brand = "Rasasi"
+        self.oud.save()
+        self.assertEqual(search_index.search("rasasi"), [self.oud.pk])
+        self.assertEqual(search_index.search("lattafa"), [])
+        self.category.name = "Men"
+        self.category.save()
+        self.assertEqual(search_index.search("men"), [self.sauvage.pk])
+        self.sauvage.delete()
+        self.assertEqual(search_index.search("sauvage"), [])
+
+    def test_expired_index_refreshes_in_background(self):
+        with override_settings(SEARCH_INDEX_TTL=0), mock.patch(
+            "product.search_index.threading.Thread"
+        ) as thread:
+            # البحث بيرجع من الفهرس القديم من غير ما يستنى البناء
+            self.assertEqual(search_index.search("elixir"), [self.sauvage.pk])
+            search_index.search("elixir")
+        thread.assert_called_once()
+        self.assertEqual(thread.call_args.kwargs["target"], search_index._refresh)
+        thread.return_value.start.assert_called_once()
+        search_index._refreshing = False
+
+    def test_changes_during_build_are_kept(self):
+        load_rows = search_index_module._load_rows
+
+        def rows(product_ids=None):
+            yield from load_rows(product_ids)
+            if product_ids is None:
+                # تعديل بعد ما البناء قرا الصف القديم
+                self.oud.brand = "Rasasi"
+                self.oud.save()
+
+        with mock.patch("product.search_index._load_rows", rows):
+            search_index.build()
+        self.assertEqual(search_index.search("rasasi"), [self.oud.pk])
+        self.assertEqual(search_index.search("lattafa"), [])
+
+    def test_filters(self):
+        ProductVariant.objects.create(
+            product=self.oud, size_ml=100, price=Decimal("900.00")
+        )
+        self.assertEqual(search_index.search("الأميرة", brands=["Dior"]), [])
+        self.assertEqual(
+            search_index.search("الأميرة", min_price=Decimal("800")), [self.oud.pk]
+        )
+        self.assertEqual(search_index.search("الأميرة", max_price=Decimal("800")), [])
+
+    def test_suggestions(self):
+        Product.objects.create(name="Dior Homme", slug="homme", brand="Dior")
+        self.assertEqual(
+            search_index.suggest("di"),
+            {
+                "products": [{"name": "Dior Homme", "slug": "homme"}],
+                "brands": ["Dior"],
+                "categories": [],
+            },
+        )
+        self.assertEqual(
+            search_index.suggest("eli")["products"],
+            [{"name": "Sauvage Élixir", "slug": "sauvage"}],
+        )
+        self.assertEqual(
+            search_index.suggest("رج")["categories"],
+            [{"name": "عطور رجالي", "slug": "men"}],
+        )
+        response = APIClient().get("/api/search/suggest/?q=lat")
+        self.assertEqual(response.json()["brands"], ["Lattafa"])
+
+    def test_suggestion_cache_is_bounded(self):
+        for index in range(500):
+            search_index.suggest(f"zq{index}")
+            search_index.suggest(f"sauvage elixir {index}")
+        self.assertTrue(all(len(key) <= 3 for key in search_index._suggestion_cache))
+        self.assertNotIn("zq1", search_index._suggestion_cache)
+        self.assertEqual(
+            search_index.suggest("sauvage e")["products"],
+            [{"name": "Sauvage Élixir", "slug": "sauvage"}],
+        )
+
+    def test_suggestions_are_rebuilt_with_the_index(self):
+        build = mock.patch.object(
+            SearchIndex,
+            "_build_suggestions",
+            wraps=SearchIndex._build_suggestions,
+        )
+        with build as build_suggestions:
+            # السعر والمخزون مش في الاقتراحات
+            ProductVariant.objects.create(
+                product=self.oud, size_ml=50, price=Decimal("100.00")
+            )
+            self.assertEqual(build_suggestions.call_count, 0)
+            self.oud.name = "Oud Royal"
+            self.oud.save()
+            self.assertEqual(build_suggestions.call_count, 1)
+            # الـ typeahead بيقرا اللي اتبنى بس
+            self.assertEqual(
+                search_index.suggest("roy")["products"],
+                [{"name": "Oud Royal", "slug": "oud"}],
+            )
+            self.sauvage.delete()
+            self.assertEqual(search_index.suggest("sauv")["products"], [])
+            self.assertEqual(build_suggestions.call_count, 2)
+
+    def test_invalid_price_is_bad_request(self):
+        client = APIClient()
+        for backend in ("memory", "db"):
+            with self.subTest(backend), override_settings(SEARCH_BACKEND=backend):
+                response = client.get("/api/search/oud/?min_price=abc")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("min_price", response.json())
+                response = client.get("/api/search/oud/?max_price=NaN")
+                self.assertEqual(response.status_code, 400)
+                response = client.get("/api/search/oud/?min_price=0&max_price=")
+                self.assertEqual(response.status_code, 200)
+
+
+class FacetsTest(TestCase):
+    def setUp(self):
+        men = Category.objects.create(name="Men")
+        create_product(1, men)
+        create_product(2, men, discount=Decimal("250.00"))
+        sold_out = create_product(3)
+        sold_out.variants.update(stock=0)
+        search_index.build()
+
+    def test_listing_facets_follow_filters(self):
+        client = APIClient()
+        self.assertNotIn("facets", client.get("/api/products/").json())
+
+        with self.assertNumQueries(5):
+            response = client.get("/api/products/?facets=1&category=men")
+        facets = response.json()["facets"]
+        self.assertEqual(
+            facets["brand"],
+            [{"value": "Brand 1", "count": 1}, {"value": "Brand 2", "count": 1}],
+        )
+        self.assertEqual(facets["category"], [{"value": "men", "count": 2}])
+        self.assertEqual(
+            facets["size_ml"],
+            [{"value": 30, "count": 2}, {"value": 100, "count": 2}],
+        )
+        self.assertEqual(facets["price"], [{"value": "0-500", "count": 2}])
+        self.assertEqual(facets["in_stock"], [{"value": True, "count": 2}])
+
+    def test_search_facets(self):
+        facets = APIClient().get("/api/search/perfume/?facets=1").json()["facets"]
+        self.assertEqual(
+            facets["in_stock"],
+            [{"value": True, "count": 2}, {"value": False, "count": 1}],
+        )
+        self.assertEqual(
+            facets["price"],
+            [{"value": "0-500", "count": 3}],
+        )
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Men")
+        self.product = create_product(1, self.category, discount=Decimal("60.00"))
+
+    def test_hits_until_catalog_changes(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/categories/normal/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/categories/normal/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()[0]["name"], "Men")
+
+        self.category.name = "Women"
+        self.category.save()
+        response = self.client.get("/api/categories/normal/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()[0]["name"], "Women")
+        self.assertEqual(cache_stats()["hits"], 1)
+        self.assertEqual(cache_stats()["misses"], 2)
+
+    def test_bulk_variant_updates_invalidate(self):
+        self.assertEqual(len(self.client.get("/api/sales/swiper/").json()), 1)
+        self.product.variants.update(discount=None)
+        response = self.client.get("/api/sales/swiper/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json(), [])
+
+    def test_conditional_get(self):
+        response = self.client.get("/api/products/")
+        etag, modified = response["ETag"], response["Last-Modified"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get("/api/offers/", HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 304)
+
+        before = self.product.updated_at
+        self.product.variants.update(stock=0)
+        self.product.refresh_from_db()
+        self.assertGreater(self.product.updated_at, before)
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_version_changes_again_after_commit(self):
+        response = self.client.get("/api/products/")
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.product.name = "Renamed"
+                self.product.save()
+                # worker تاني قبل الـ commit: بيشوف نسخة جديدة وبيقرا الصف القديم
+                inside = catalog_version()
+        self.assertNotEqual(str(inside), etag.strip('"'))
+        self.assertNotEqual(catalog_version(), inside)
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=f'"{inside}"')
+        self.assertEqual(response.status_code, 200)
+
+
+class FastSerializerTest(TestCase):
+    def test_same_json_as_product_serializer(self):
+        create_product(1, Category.objects.create(name="Men"), Decimal("12.50"))
+        create_product(2)
+        Product.objects.create(name="No variants", slug="empty", brand="X")
+        products = list(with_listing_data(Product.objects.all()))
+        request = APIRequestFactory().get("/api/products/")
+        render = JSONRenderer().render
+
+        for context_request in (None, request):
+            expected = ProductSerializer(
+                products, many=True, context={"request": context_request}
+            ).data
+            self.assertEqual(
+                render(serialize_products(products, context_request)),
+                render(expected),
+            )
+
+
+class SparseFieldsTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        men = Category.objects.create(name="Men")
+        create_product(1, men, discount=Decimal("30.00"))
+        create_product(2, men)
+        search_index.build()
+
+    def test_card_view(self):
+        with self.assertNumQueries(3) as context:
+            response = self.client.get("/api/products/?view=card")
+        self.assertNotIn("description", context.captured_queries[1]["sql"])
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {
+                    "id": 2,
+                    "name": "Perfume 2",
+                    "slug": "perfume-2",
+                    "brand": "Brand 2",
+                    "min_price": 300.0,
+                    "max_price": 750.0,
+                    "image": "http://testserver/media/product_images/2.jpg",
+                    "has_discount": False,
+                },
+                {
+                    "id": 1,
+                    "name": "Perfume 1",
+                    "slug": "perfume-1",
+                    "brand": "Brand 1",
+                    "min_price": 270.0,
+                    "max_price": 720.0,
+                    "image": "http://testserver/media/product_images/1.jpg",
+                    "has_discount": True,
+                },
+            ],
+        )
+        sale = self.client.get("/api/sales/swiper/?view=card").json()
+        self.assertEqual([product["slug"] for product in sale], ["perfume-1"])
+
+    def test_fields(self):
+        # query واحدة: من غير صور ولا variants، والقسم بـ join
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/search/perfume/?fields=slug,category")
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {"slug": "perfume-2", "category": "Men"},
+                {"slug": "perfume-1", "category": "Men"},
+            ],
+        )
+        response = self.client.get("/api/products/?fields=slug,variants")
+        self.assertEqual(len(response.json()["results"][0]["variants"]), 2)
+        response = self.client.get("/api/products/?fields=slug,password")
+        self.assertEqual(response.status_code, 400)
+
+
+def jpeg_upload(width, height, name="photo.jpg"):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # الصورة متصورة بالعرض
+    exif[0x010F] = "Phone"
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class ImagePipelineTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.product = Product.objects.create(name="Oud", slug="oud", brand="X")
+
+    def test_upload_is_stripped_and_derivatives_created(self):
+        image = ProductImage.objects.create(
+            product=self.product, image=jpeg_upload(800, 1200)
+        )
+        # اتلفت حسب الـ EXIF والـ EXIF نفسه اتمسح
+        with Image.open(default_storage.path(image.image.name)) as original:
+            self.assertEqual(original.size, (1200, 800))
+            self.assertEqual(dict(original.getexif()), {})
+        self.assertEqual(image.image_width, 1200)
+
+        for width in (320, 640, 1024, 1200):
+            for extension in ("webp", "jpg"):
+                name = f"derivatives/{image.image.name}-{width}w.{extension}"
+                self.assertTrue(default_storage.exists(name), name)
+
+        data = APIClient().get("/api/product/oud/").json()["images"][0]
+        root = data["image"].replace("/media/", "/media/derivatives/")
+        self.assertEqual(
+            data["srcset"]["webp"],
+            ", ".join(f"{root}-{w}w.webp {w}w" for w in (320, 640, 1024, 1200)),
+        )
+
+    def test_derivatives_of_same_stem_do_not_collide(self):
+        names = []
+        for extension, image_format in (("jpg", "JPEG"), ("png", "PNG")):
+            buffer = BytesIO()
+            Image.new("RGB", (400, 300), "blue").save(buffer, image_format)
+            name = f"product_images/same.{extension}"
+            default_storage.save(name, BytesIO(buffer.getvalue()))
+            image = ProductImage.objects.create(product=self.product, image=name)
+            generate_derivatives(image.image)
+            names.append(name)
+
+        jpg, png = (f"derivatives/{name}-320w.webp" for name in names)
+        self.assertNotEqual(jpg, png)
+        self.assertTrue(default_storage.exists(jpg))
+        self.assertTrue(default_storage.exists(png))
+
+    def test_backfill_command(self):
+        buffer = BytesIO()
+        Image.new("RGB", (500, 300), "blue").save(buffer, "PNG")
+        default_storage.save("product_images/old.png", BytesIO(buffer.getvalue()))
+        image = ProductImage.objects.create(
+            product=self.product, image="product_images/old.png"
+        )
+        ProductImage.objects.create(
+            product=self.product, image="product_images/gone.jpg"
+        )
+        self.assertIsNone(image.image_width)
+
+        call_command("generate_image_derivatives", stdout=StringIO(), stderr=StringIO())
+        image.refresh_from_db()
+        self.assertEqual(image.image_width, 500)
+        # الأصل المضغوط اتحفظ باسم جديد قبل ما القديم يتمسح
+        name = image.image.name
+        self.assertNotEqual(name, "product_images/old.png")
+        self.assertTrue(default_storage.exists(name))
+        self.assertFalse(default_storage.exists("product_images/old.png"))
+        self.assertTrue(default_storage.exists(f"derivatives/{name}-320w.webp"))
+        self.assertTrue(default_storage.exists(f"derivatives/{name}-500w.jpg"))
+
+        call_command(
+            "generate_image_derivatives",
+            force=True,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        image.refresh_from_db()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(f"derivatives/{name}-320w.webp"))
+        self.assertTrue(default_storage.exists(image.image.name))
+
+    def test_backfill_keeps_original_when_save_fails(self):
+        buffer = BytesIO()
+        Image.new("RGB", (500, 300), "blue").save(buffer, "PNG")
+        default_storage.save("product_images/old.png", BytesIO(buffer.getvalue()))
+        image = ProductImage.objects.create(
+            product=self.product, image="product_images/old.png"
+        )
+        with mock.patch(
+            "django.core.files.storage.FileSystemStorage._save",
+            side_effect=OSError("disk full"),
+        ):
+            call_command(
+                "generate_image_derivatives", stdout=StringIO(), stderr=StringIO()
+            )
+        image.refresh_from_db()
+        self.assertEqual(image.image.name, "product_images/old.png")
+        self.assertTrue(default_storage.exists("product_images/old.png"))
+
+
+class ResizedImageTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        buffer = BytesIO()
+        Image.new("RGB", (1000, 500), "green").save(buffer, "PNG")
+        default_storage.save("offers/banner.png", BytesIO(buffer.getvalue()))
+
+    def test_resize_once_and_serve_from_disk(self):
+        url = "/media/resized/400x400/offers/banner.png"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("immutable", response["Cache-Control"])
+        with Image.open(BytesIO(b"".join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (400, 400))
+        resized_dir = os.path.join(settings.MEDIA_ROOT, "resized", "400x400", "offers")
+        self.assertEqual(os.listdir(resized_dir), ["banner.png"])
+
+        cached = default_storage.path("resized/400x400/offers/banner.png")
+        modified = os.path.getmtime(cached)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(os.path.getmtime(cached), modified)
+
+    def test_rejects_unknown_sizes_and_paths(self):
+        for url in (
+            "/media/resized/401x400/offers/banner.png",
+            "/media/resized/400x400/offers/missing.png",
+            "/media/resized/400x400/../../etc/passwd",
+            "/media/resized/400x400/resized/400x400/offers/banner.png",
+        ):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+
+class ProductsBatchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.products = [create_product(index) for index in range(5)]
+
+    def test_keeps_requested_order_with_constant_queries(self):
+        third, first, missing = self.products[3], self.products[0], 999
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                f"/api/products/batch/?ids={third.pk},{first.pk},{missing},{third.pk}"
+            )
+        self.assertEqual(
+            [product["slug"] for product in response.json()],
+            ["perfume-3", "perfume-0"],
+        )
+        self.assertEqual(
+            response.json()[0],
+            self.client.get("/api/product/perfume-3/").json(),
+        )
+
+        response = self.client.get("/api/products/batch/?slugs=perfume-4,perfume-1")
+        self.assertEqual(
+            [product["slug"] for product in response.json()],
+            ["perfume-4", "perfume-1"],
+        )
+
+    def test_rejects_bad_requests(self):
+        too_many = ",".join(str(value) for value in range(101))
+        for query in (
+            f"ids={too_many}",
+            "ids=abc",
+            "ids=1&slugs=perfume-1",
+            "ids=99999999999999999999999",
+            "ids=-99999999999999999999999",
+        ):
+            response = self.client.get(f"/api/products/batch/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+class CatalogFeedTest(TestCase):
+    def read_feed(self, url):
+        response = self.client.get(url)
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        return [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+    @override_settings(CATALOG_FEED_LAG=timedelta(0))
+    def test_snapshot_and_delta(self):
+        men = Category.objects.create(name="Men")
+        first, second, third = (create_product(index, men) for index in range(3))
+        lines = self.read_feed("/api/catalog/feed/")
+        self.assertEqual(
+            [line["data"]["slug"] for line in lines[:-1]],
+            ["perfume-0", "perfume-1", "perfume-2"],
+        )
+        self.assertEqual(
+            lines[1]["data"], self.client.get("/api/product/perfume-1/").json()
+        )
+        version = lines[-1]["version"]
+        self.assertEqual(self.read_feed(f"/api/catalog/feed/?since={version}")[:-1], [])
+
+        first.variants.update(stock=0)
+        ProductImage.objects.create(product=second, image="product_images/new.jpg")
+        third.delete()
+        lines = self.read_feed(f"/api/catalog/feed/?since={version}")
+        self.assertEqual(
+            [(line["type"], line.get("data", line).get("slug")) for line in lines[:-1]],
+            [
+                ("product", "perfume-0"),
+                ("product", "perfume-1"),
+                ("deleted", "perfume-2"),
+            ],
+        )
+
+        version = lines[-1]["version"]
+        men.name = "Men perfumes"
+        men.save()
+        lines = self.read_feed(f"/api/catalog/feed/?since={version}")
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(self.client.get("/api/catalog/feed/?since=x").status_code, 400)
+
+    def test_rows_committed_after_the_feed_started_are_not_skipped(self):
+        gone = create_product(1)
+        gone_id = gone.pk
+        started = timezone.now()
+        version = self.read_feed("/api/catalog/feed/")[-1]["version"]
+        # صفوف وقتها قبل بداية الـ feed بس اتعملها commit بعد ما خلص
+        late = create_product(2)
+        Product.objects.filter(pk=late.pk).update(
+            updated_at=started - timedelta(seconds=1)
+        )
+        gone.delete()
+        ProductTombstone.objects.update(deleted_at=started - timedelta(seconds=1))
+
+        lines = self.read_feed(f"/api/catalog/feed/?since={version}")
+        self.assertIn(
+            ("product", "perfume-2"),
+            [
+                (line["type"], line["data"]["slug"])
+                for line in lines
+                if line["type"] == "product"
+            ],
+        )
+        self.assertIn({"type": "deleted", "id": gone_id, "slug": "perfume-1"}, lines)
+        # التعديلات اللي في مدة الـ lag بتتكرر، بس الـ version عمره ما يرجع لورا
+        self.assertGreaterEqual(lines[-1]["version"], version)
+
+    def test_export_command(self):
+        create_product(1)
+        output = StringIO()
+        call_command("export_catalog", base_url="https://cdn.example", stdout=output)
+        product = json.loads(output.getvalue().splitlines()[0])["data"]
+        self.assertTrue(
+            product["images"][0]["image"].startswith("https://cdn.example/media/")
+        )
+
+
+class RelatedProductsTest(TestCase):
+    def order(self, *products, days_ago=0):
+        order = Order.objects.create(
+            customer_phone="01000000000", governorate="Cairo", city="Nasr", street="1"
+        )
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        for product in products:
+            OrderItem.objects.create(
+                order=order, product=product, name=product.name, price=Decimal("1")
+            )
+
+    def test_build_and_serve(self):
+        oud, musk, amber, rose = (create_product(index) for index in range(4))
+        self.order(oud, musk)
+        self.order(oud, musk)
+        self.order(oud, amber)
+        # قديم جدًا فوزنه تقريبًا صفر
+        self.order(oud, rose, days_ago=3650)
+        version = catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("build_related_products", top_k=2, stdout=StringIO())
+        self.assertNotEqual(catalog_version(), version)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(f"/api/product/{oud.slug}/related/")
+        self.assertEqual(
+            [product["slug"] for product in response.json()],
+            [musk.slug, amber.slug],
+        )
+        self.assertEqual(
+            [
+                p["slug"]
+                for p in self.client.get(f"/api/product/{rose.slug}/related/").json()
+            ],
+            [oud.slug],
+        )
+        self.assertEqual(
+            self.client.get("/api/product/missing/related/").status_code, 404
+        )
+        lonely = create_product(4)
+        self.assertEqual(
+            self.client.get(f"/api/product/{lonely.slug}/related/").json(), []
+        )
+
+
+class SalesCountersTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.oud, self.musk, self.amber = (create_product(index) for index in range(3))
+
+    def order(self, *lines):
+        order = Order.objects.create(
+            customer_phone="01000000000", governorate="Cairo", city="Nasr", street="1"
+        )
+        for variant, quantity in lines:
+            OrderItem.objects.create(
+                order=order,
+                product=variant.product,
+                variant=variant,
+                name=variant.product.name,
+                quantity=quantity,
+                price=Decimal("1"),
+            )
+        record_sales(order)
+
+    def slugs(self, url):
+        return [product["slug"] for product in self.client.get(url).json()["results"]]
+
+    def test_order_updates_counters_without_touching_catalog(self):
+        small, large = self.oud.variants.order_by("size_ml")
+        updated_at = Product.objects.get(pk=self.oud.pk).updated_at
+        version = catalog_version()
+
+        self.order((small, 2), (large, 1))
+        self.order((small, 1))
+
+        oud = Product.objects.get(pk=self.oud.pk)
+        self.assertEqual((oud.sales_total, oud.sales_7d, oud.trending_score), (4, 4, 4))
+        self.assertEqual(oud.updated_at, updated_at)
+        self.assertEqual(catalog_version(), version)
+        small.refresh_from_db()
+        self.assertEqual((small.sales_total, small.sales_7d), (3, 3))
+        self.assertEqual(DailySales.objects.get(variant=small).quantity, 3)
+
+    def test_compaction_and_ordering(self):
+        today = timezone.localdate()
+        musk, amber = self.musk.variants.first(), self.amber.variants.first()
+        # مسك اتباع كتير من 10 أيام، والعنبر شوية بس النهارده
+        self.order((musk, 10))
+        DailySales.objects.filter(variant=musk).update(date=today - timedelta(days=10))
+        self.order((amber, 3))
+        etag = self.client.get("/api/products/?ordering=trending")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("compact_sales", keep_days=7, stdout=StringIO())
+        response = self.client.get(
+            "/api/products/?ordering=trending", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+        musk_product = Product.objects.get(pk=self.musk.pk)
+        self.assertEqual(musk_product.sales_total, 10)
+        self.assertEqual(musk_product.sales_7d, 0)
+        # 10 × 0.5^(10/3) ≈ 1
+        self.assertAlmostEqual(musk_product.trending_score, 0.99, places=2)
+        self.assertEqual(Product.objects.get(pk=self.amber.pk).trending_score, 3)
+        self.assertFalse(DailySales.objects.filter(variant=musk).exists())
+
+        self.assertEqual(
+            self.slugs("/api/products/?ordering=bestseller"),
+            [self.musk.slug, self.amber.slug, self.oud.slug],
+        )
+        self.assertEqual(
+            self.slugs("/api/products/?ordering=trending&pagination=cursor"),
+            [self.amber.slug, self.musk.slug, self.oud.slug],
+        )
+        self.assertEqual(
+            self.slugs("/api/products/?ordering=-bestseller"),
+            [self.oud.slug, self.amber.slug, self.musk.slug],
+        )
+
+
+class BrandCountsTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.men = Category.objects.create(name="Men")
+        self.women = Category.objects.create(name="Women")
+
+    def product(self, slug, brand, category):
+        return Product.objects.create(
+            name=slug, slug=slug, brand=brand, category=category
+        )
+
+    def counts(self):
+        return {
+            brand.name: (
+                brand.product_count,
+                {
+                    count.category.name: count.product_count
+                    for count in brand.category_counts.all()
+                },
+            )
+            for brand in Brand.objects.prefetch_related("category_counts__category")
+        }
+
+    def test_spelling_variants_share_one_brand(self):
+        self.product("a", "Dior", self.men)
+        self.product("b", "  dior ", self.women)
+        self.product("c", "DIOR", self.men)
+        self.product("d", "Tom  Ford", self.men)
+
+        self.assertEqual(
+            self.counts(),
+            {"Dior": (3, {"Men": 2, "Women": 1}), "Tom Ford": (1, {"Men": 1})},
+        )
+        self.assertEqual(
+            set(Product.objects.values_list("brand", flat=True)), {"Dior", "Tom Ford"}
+        )
+        response = self.client.get("/api/products/?brand=dior,TOM FORD").json()
+        self.assertEqual(response["count"], 4)
+
+    def test_counts_follow_product_changes(self):
+        first = self.product("a", "Dior", self.men)
+        self.product("b", "Dior", self.men)
+        first.category = self.women
+        first.brand = "Chanel"
+        first.save()
+        self.assertEqual(
+            self.counts(),
+            {"Dior": (1, {"Men": 1}), "Chanel": (1, {"Women": 1})},
+        )
+
+        Product.objects.filter(slug="b").delete()
+        self.assertEqual(self.counts()["Dior"], (0, {}))
+
+        brand = Brand.objects.get(name="Chanel")
+        brand.name = "CHANEL"
+        with mock.patch("product.models.update_search_vectors") as update_vectors:
+            brand.save()
+        update_vectors.assert_called_once_with([first.pk])
+        first.refresh_from_db()
+        self.assertEqual(first.brand, "CHANEL")
+
+    def test_brand_list_is_one_query(self):
+        for index, brand in enumerate(["Dior", "Dior", "Chanel", "Gucci"]):
+            self.product(f"p{index}", brand, self.men if index else self.women)
+        self.client.get("/api/brands/?category=missing")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/brands/")
+        self.assertEqual(response.json(), ["Dior", "Chanel", "Gucci"])
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/brands/?category=men")
+        self.assertEqual(response.json(), ["Chanel", "Dior", "Gucci"])
+        response = self.client.get("/api/brands/?search=p1")
+        self.assertEqual(response.json(), ["Dior"])
+
+
+class SeedPerfTest(TestCase):
+    def test_seeds_consistent_rows(self):
+        call_command(
+            "seed_perf",
+            products=30,
+            users=5,
+            carts=4,
+            orders=10,
+            transactions=3,
+            batch_size=7,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Product.objects.count(), 30)
+        self.assertEqual(ProductVariant.objects.count(), 90)
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertTrue(OrderItem.objects.filter(variant__isnull=False).exists())
+        self.assertEqual(sum(Brand.objects.values_list("product_count", flat=True)), 30)
+
+        # الملخص المحسوب في الـ command هو نفسه اللي الداتابيز بتحسبه
+        summary = (
+            "min_final_price",
+            "max_final_price",
+            "max_discount_pct",
+            "total_stock",
+        )
+        seeded = list(Product.objects.order_by("id").values_list(*summary))
+        refresh_price_summaries(Product.objects.values_list("id", flat=True))
+        self.assertEqual(
+            list(Product.objects.order_by("id").values_list(*summary)), seeded
+        )
+
+
+class ExplainHotQueriesTest(TestCase):
+    def test_sequential_scans(self):
+        plan = "\n".join(
+            [
+                "4 0 0 SEARCH product_productvariant USING INDEX x (product_id=?)",
+                "5 0 0 SCAN product_product USING INDEX product_priority_idx",
+                "7 0 0 SCAN order_order",
+                "9 0 0 USE TEMP B-TREE FOR ORDER BY",
+            ]
+        )
+        self.assertEqual(sequential_scans(plan, "sqlite"), ["order_order"])
+        self.assertEqual(
+            sequential_scans(
+                "  ->  Seq Scan on product_product  (cost=0.00..1)", "postgresql"
+            ),
+            ["product_product"],
+        )
+
+    def test_command(self):
+        call_command("seed_perf", products=20, orders=10, users=5, stdout=StringIO())
+        out = StringIO()
+        call_command("explain_hot_queries", stdout=out)
+        self.assertIn("hot queries use indexes", out.getvalue())
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    أساس تستات عدد الـ queries لكل endpoint: الـ budget لازم يفضل هو هو لما
+    الداتا تكبر (grow)، فأي N+1 جديد في view أو serializer بيوقع التست.
+    """
+
+    sizes = (5, 60)
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+
+    def grow(self, size):
+        """
+        Hook: بيكبر الداتا لحد size قبل قياس الـ budgets في assertBudgets.
+        الأساس مش بيعمل حاجة، فالتستات اللي الداتا بتاعتها ثابتة مش لازم تعمله.
+        """
+
+    def assertQueryBudget(self, budget, request):
+        # نسخة كتالوج جديدة فالـ cached_response ما يرجعش HIT، و Last-Modified
+        # متخزن زي أي request بعد أول واحد
+        bump_catalog_version()
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+            if response.streaming:
+                b"".join(response.streaming_content)
+        if response.status_code >= 300:
+            self.fail(f"{response.status_code}: {response.content[:300]}")
+        queries = [query["sql"] for query in context.captured_queries]
+        self.assertEqual(len(queries), budget, "\n".join(queries))
+        return response
+
+    def assertBudgets(self, budgets):
+        """
+        budgets بترجع {url: budget} لكل GET، وبتتنده بعد كل grow عشان الروابط
+        اللي فيها ids تبقى صح.
+        """
+        for size in self.sizes:
+            self.grow(size)
+            for url, budget in budgets().items():
+                with self.subTest(url, size=size):
+                    self.assertQueryBudget(budget, lambda: self.client.get(url))
+
+
+class ProductEndpointsQueryBudgetTest(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.men = Category.objects.create(name="Men")
+        Category.objects.create(name="Special", is_special=True)
+
+    def grow(self, size):
+        for index in range(Product.objects.count(), size):
+            product = create_product(index, self.men, discount=Decimal("60.00"))
+            if index:
+                ProductRelation.objects.create(
+                    product_id=self.first_id, related=product, score=1, rank=index
+                )
+            else:
+                self.first_id = product.id
+            OfferImage.objects.create(image=f"offers/{index}.jpg")
+            ReviewsImage.objects.create(image=f"reviews/{index}.jpg")
+        search_index.build()
+
+    def budgets(self):
+        ids = ",".join(map(str, Product.objects.values_list("id", flat=True)[:50]))
+        slugs = ",".join(Product.objects.values_list("slug", flat=True)[:50])
+        # صفحة + count + صور + variants، والـ cursor من غير count
+        return {
+            "/api/products/": 4,
+            "/api/products/?pagination=cursor&ordering=bestseller": 3,
+            "/api/products/?view=card": 3,
+            "/api/products/?pagination=cursor&ordering=trending&view=card": 2,
+            "/api/products/?pagination=cursor&ordering=bestseller&fields=name": 1,
+            "/api/products/?facets=1&brand=brand-1&category=men": 5,
+            "/api/products/swiper/": 3,
+            f"/api/products/batch/?ids={ids}": 3,
+            f"/api/products/batch/?slugs={slugs}": 3,
+            "/api/catalog/feed/": 3,
+            "/api/product/perfume-0/": 3,
+            "/api/product/perfume-0/related/": 4,
+            "/api/search/suggest/?q=perf": 0,
+            "/api/search/perfume/?brand=Brand 1": 3,
+            "/api/search/perfume/?pagination=cursor": 3,
+            "/api/sales/": 4,
+            "/api/sales/swiper/": 3,
+            "/api/categories/normal/": 1,
+            "/api/categories/special/": 1,
+            "/api/brands/": 1,
+            "/api/brands/?category=Men": 1,
+            "/api/offers_images/": 1,
+            "/api/reviews/": 1,
+        }
+
+    def test_budgets_stay_flat(self):
+        self.assertBudgets(self.budgets)
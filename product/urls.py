@@ -4,7 +4,15 @@ from django.urls import path
 urlpatterns = [
     path("products/", views.get_all_products, name="products"),
     path("products/swiper/", views.get_latest_products, name="products"),
+    path("products/batch/", views.get_products_batch, name="products_batch"),
+    path("catalog/feed/", views.get_catalog_feed, name="catalog_feed"),
     path("product/<slug:slug>/", views.get_by_id_product, name="get_by_id_product"),
+    path(
+        "product/<slug:slug>/related/",
+        views.get_related_products,
+        name="get_related_products",
+    ),
+    path("search/suggest/", views.search_suggestions, name="search_suggestions"),
     path("search/<str:keyword>/", views.search_products_view, name="search_products"),
     path("sales/", views.flash_sale_products, name="sales"),
     path("sales/swiper/", views.flash_sale_swiper, name="sales swiper"),
@@ -1,19 +1,153 @@
-from django.db.models import Q, Value, IntegerField, Case, When
-from .models import Product
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import (
+    F,
+    Q,
+    Value,
+    IntegerField,
+    Case,
+    When,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
+from django.db.models.functions import Greatest
+from .models import Product, ProductImage, SEARCH_CONFIG
+
+# الأعمدة اللي كل حقل في الـ payload محتاجها لما ?fields= أو ?view=card
+FIELD_COLUMNS = {
+    "id": ("id",),
+    "slug": ("slug",),
+    "name": ("name",),
+    "description": ("description",),
+    "category": ("category__name",),
+    "brand": ("brand",),
+    "min_price": ("min_final_price",),
+    "max_price": ("max_final_price",),
+    "allow_offer": ("allow_offer",),
+    "created_at": ("created_at",),
+    "has_discount": ("max_discount_pct",),
+}
+# مفاتيح الترتيب (الـ cursor بيقرا آخر قيمة منها) والـ slug بيتحملوا دايمًا
+KEY_COLUMNS = (
+    "id",
+    "slug",
+    "priority",
+    "min_final_price",
+    "created_at",
+    "max_discount_pct",
+    "sales_total",
+    "trending_score",
+)
+
+
+def with_listing_data(queryset, fields=None):
+    """
+    يجهز الـ queryset لـ ProductSerializer(many=True):
+    الصور والـ variants بـ prefetch وأقل/أعلى سعر متخزنين على المنتج،
+    فالصفحة كلها بتتحمل بعدد ثابت من الـ queries مهما كان حجمها.
+    لو fields متحددة بيحمل الأعمدة والـ prefetches اللي الحقول دي محتاجاها بس.
+    """
+    if fields is None:
+        return (
+            queryset.select_related("category")
+            .prefetch_related("images", "variants")
+            .defer("search_vector")
+        )
+
+    columns = {*KEY_COLUMNS}
+    for name in fields:
+        columns.update(FIELD_COLUMNS.get(name, ()))
+    queryset = queryset.only(*columns)
+    if "category" in fields:
+        queryset = queryset.select_related("category")
+    if "variants" in fields:
+        queryset = queryset.prefetch_related("variants")
+    if "images" in fields:
+        queryset = queryset.prefetch_related("images")
+    elif "image" in fields:
+        # أول صورة بس لكل منتج بدل كل الصور
+        first_image = ProductImage.objects.filter(product=OuterRef("product")).order_by(
+            "id"
+        )
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                "images",
+                queryset=ProductImage.objects.filter(
+                    pk=Subquery(first_image.values("pk")[:1])
+                ).only("id", "product_id", "image"),
+                to_attr="card_images",
+            )
+        )
+    return queryset
+
+
+def hydrate_products(ids, fields=None, key="pk"):
+    """
+    ترجع المنتجات بنفس ترتيب الـ ids (أو الـ slugs مع key="slug") جاهزة
+    للـ serializer، واللي مش موجود بيتشال.
+    """
+    products = with_listing_data(
+        Product.objects.filter(**{f"{key}__in": ids}), fields
+    ).order_by()
+    by_key = {getattr(product, key): product for product in products}
+    return [by_key[value] for value in ids if value in by_key]
 
 
 def search_products(query):
+    """
+    البحث في المنتجات مترتب حسب الأهمية.
+    على PostgreSQL: full-text على search_vector + trigram عشان الأخطاء الإملائية،
+    غير كده (SQLite في التطوير) بنرجع لـ icontains.
+    """
     query = query.strip().lower()
 
+    if connection.vendor == "postgresql":
+        return _postgres_search(query)
+
     return (
         Product.objects.annotate(
             search_priority=Case(
                 When(Q(name__icontains=query), then=Value(1)),
-                When(Q(description__icontains=query), then=Value(2)),
-                default=Value(3),
+                When(Q(brand__icontains=query), then=Value(2)),
+                When(Q(description__icontains=query), then=Value(3)),
+                default=Value(4),
                 output_field=IntegerField(),
             )
         )
-        .filter(Q(name__icontains=query) | Q(description__icontains=query))
-        .order_by("search_priority")
+        .filter(
+            Q(name__icontains=query)
+            | Q(brand__icontains=query)
+            | Q(description__icontains=query)
+        )
+        .order_by("search_priority", "-id")
+    )
+
+
+def _postgres_search(query):
+    # كل كلمة بتتطابق كـ prefix عشان البحث وهو بيكتب
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return Product.objects.none()
+    search_query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+
+    return (
+        Product.objects.annotate(
+            rank=SearchRank(F("search_vector"), search_query),
+            similarity=Greatest(
+                TrigramSimilarity("name", query), TrigramSimilarity("brand", query)
+            ),
+        )
+        .filter(
+            Q(search_vector=search_query)
+            | Q(name__trigram_similar=query)
+            | Q(brand__trigram_similar=query)
+        )
+        .order_by("-rank", "-similarity", "-id")
     )
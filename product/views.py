@@ -1,135 +1,274 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import F, ExpressionWrapper, FloatField, Count
-from django.db.models.functions import Cast
+from django.db.models import Count
 from rest_framework import status
 
-from .models import Product, Category, OfferImage, ReviewsImage
-from .serializers import ProductSerializer, OfferImageSerializer, ReviewsImageSerializer
+from .models import (
+    Brand,
+    BrandCategoryCount,
+    Product,
+    Category,
+    OfferImage,
+    ReviewsImage,
+    brand_slug,
+)
+from .serializers import (
+    ProductSerializer,
+    OfferImageSerializer,
+    PriceRangeSerializer,
+    ReviewsImageSerializer,
+)
 from .filters import ProductsFilter
-from .utils import search_products
+from .utils import search_products, with_listing_data, hydrate_products
+from .search_index import index as search_index, MAX_SUGGESTIONS
+from .pagination import KeysetPagination, use_cursor_pagination
+from .cache import cached_response, catalog_conditional
+from .fast_serializers import requested_fields, serialize_products
+from .images import srcset
+from .feed import catalog_feed, datetime_from_version
 
 pageSize = 24
+MAX_BRANDS = 10
 
 
+def add_facets(request, response, product_ids):
+    """?facets=1 بيضيف عدد المنتجات لكل براند/قسم/حجم/سعر/توفر لنفس الفلتر."""
+    if request.GET.get("facets") in ("1", "true"):
+        response.data["facets"] = search_index.facet_counts(product_ids)
+    return response
+
+
+@catalog_conditional
 @api_view(["GET"])
 def get_all_products(request):
     products = ProductsFilter(
         request.GET, queryset=Product.objects.all().order_by("-priority", "-id")
     )
-    paginator = PageNumberPagination()
+    if use_cursor_pagination(request):
+        paginator = KeysetPagination()
+    else:
+        paginator = PageNumberPagination()
     paginator.page_size = pageSize
-    queryset = paginator.paginate_queryset(products.qs, request)
-    serializer = ProductSerializer(queryset, many=True, context={"request": request})
-    return paginator.get_paginated_response(serializer.data)
+    fields = requested_fields(request)
+    queryset = paginator.paginate_queryset(
+        with_listing_data(products.qs, fields), request
+    )
+    response = paginator.get_paginated_response(
+        serialize_products(queryset, request, fields)
+    )
+    # queryset lazy، فالـ query دي بتتنفذ بس لو facets مطلوبة
+    return add_facets(
+        request, response, products.qs.order_by().values_list("id", flat=True)
+    )
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def get_latest_products(request):
-    products = Product.objects.all().order_by("-id")[:10]
-    serializer = ProductSerializer(products, many=True, context={"request": request})
-    return Response(serializer.data)
+    fields = requested_fields(request)
+    products = with_listing_data(Product.objects.all(), fields).order_by("-id")[:10]
+    return Response(serialize_products(products, request, fields))
+
+
+@require_GET
+def get_catalog_feed(request):
+    """الكتالوج كله NDJSON، أو اللي اتغير من ?since=<version> بس."""
+    since = request.GET.get("since")
+    if since is not None:
+        try:
+            datetime_from_version(since)
+        except (ValueError, OverflowError):
+            return JsonResponse({"error": "Invalid since version."}, status=400)
+    return StreamingHttpResponse(
+        catalog_feed(since, request.build_absolute_uri),
+        content_type="application/x-ndjson; charset=utf-8",
+    )
+
+
+@catalog_conditional
+@api_view(["GET"])
+def get_related_products(request, slug):
+    """المنتجات اللي بتتشرى مع المنتج ده، من ProductRelation المحسوب مسبقًا."""
+    # LEFT JOIN من المنتج: صف واحد فيه None لو مالوش relations، ومفيش صفوف
+    # خالص لو الـ slug مش موجود، فالـ 404 من غير query زيادة
+    rows = list(
+        Product.objects.filter(slug=slug)
+        .order_by("relations__rank")
+        .values_list("relations__related_id", flat=True)
+    )
+    if not rows:
+        raise Http404("No Product matches the given query.")
+    related_ids = [related_id for related_id in rows if related_id is not None]
+    fields = requested_fields(request)
+    return Response(
+        serialize_products(hydrate_products(related_ids, fields), request, fields)
+    )
+
 
+# أقصى عدد منتجات في طلب /products/batch/ واحد
+MAX_BATCH_SIZE = 100
 
+
+@catalog_conditional
+@api_view(["GET"])
+def get_products_batch(request):
+    """
+    المنتجات اللي الفرونت عنده الـ ids أو الـ slugs بتاعتها (الكارت، المفضلة،
+    اللي اتشاف مؤخرًا) في طلب واحد وبنفس الترتيب وبنفس شكل get_by_id_product.
+    """
+    ids = [value for value in request.GET.get("ids", "").split(",") if value]
+    slugs = [value for value in request.GET.get("slugs", "").split(",") if value]
+    if ids and slugs:
+        return Response(
+            {"error": "Use either ids or slugs."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        keys = [int(value) for value in ids] if ids else slugs
+        if ids:
+            # برة range الـ BigAutoField الداتابيز بترفع OverflowError/DataError
+            id_field = Product._meta.pk
+            for key in keys:
+                id_field.run_validators(key)
+    except (ValueError, DjangoValidationError):
+        return Response(
+            {"error": "ids must be integers."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    keys = list(dict.fromkeys(keys))
+    if len(keys) > MAX_BATCH_SIZE:
+        return Response(
+            {"error": f"At most {MAX_BATCH_SIZE} products per request."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    fields = requested_fields(request)
+    products = hydrate_products(keys, fields, key="pk" if ids else "slug")
+    return Response(serialize_products(products, request, fields))
+
+
+@catalog_conditional
 @api_view(["GET"])
 def get_by_id_product(request, slug):
-    product = get_object_or_404(Product, slug=slug)
+    product = get_object_or_404(with_listing_data(Product.objects.all()), slug=slug)
     serializer = ProductSerializer(product, context={"request": request})
     return Response(serializer.data)
 
 
+@catalog_conditional
 @api_view(["GET"])
 def search_products_view(request, keyword):
-    base_queryset = search_products(keyword)
     paginator = PageNumberPagination()
     paginator.page_size = pageSize
+    fields = requested_fields(request)
 
     # Apply filters by brand, category, min/max price
     brand = request.GET.get("brand")
     category = request.GET.get("category")
-    min_price = request.GET.get("min_price")
-    max_price = request.GET.get("max_price")
+    prices = PriceRangeSerializer(
+        data={
+            name: value
+            for name in ("min_price", "max_price")
+            if (value := request.GET.get(name))
+        }
+    )
+    prices.is_valid(raise_exception=True)
+    min_price = prices.validated_data.get("min_price")
+    max_price = prices.validated_data.get("max_price")
+
+    if settings.SEARCH_BACKEND == "memory":
+        # الترتيب والفلترة من الفهرس، والداتابيز بس لتحميل الصفحة نفسها
+        ranked = search_index.rank(
+            keyword,
+            brands=brand.split(",") if brand else None,
+            categories=category.split(",") if category else None,
+            min_price=min_price,
+            max_price=max_price,
+        )
+        product_ids = [-negative_id for _, negative_id in ranked]
+        if use_cursor_pagination(request):
+            paginator = KeysetPagination()
+            paginator.page_size = pageSize
+            page = paginator.paginate_ranked(ranked, request)
+            page_ids = [-negative_id for _, negative_id in page]
+        else:
+            page_ids = paginator.paginate_queryset(product_ids, request)
+        response = paginator.get_paginated_response(
+            serialize_products(hydrate_products(page_ids, fields), request, fields)
+        )
+        return add_facets(request, response, product_ids)
+
+    base_queryset = search_products(keyword)
 
     if brand:
-        base_queryset = base_queryset.filter(brand__in=brand.split(","))
+        base_queryset = base_queryset.filter(
+            brand_ref__slug__in=[brand_slug(value) for value in brand.split(",")]
+        )
     if category:
         base_queryset = base_queryset.filter(category__name__in=category.split(","))
-    if min_price:
-        base_queryset = base_queryset.filter(price__gte=min_price)
-    if max_price:
-        base_queryset = base_queryset.filter(price__lte=max_price)
+    if min_price is not None:
+        base_queryset = base_queryset.filter(min_final_price__gte=min_price)
+    if max_price is not None:
+        base_queryset = base_queryset.filter(min_final_price__lte=max_price)
 
     # ✅ هنا التصحيح:
-    result_page = paginator.paginate_queryset(base_queryset, request)
-    serializer = ProductSerializer(result_page, many=True, context={"request": request})
-    return paginator.get_paginated_response(serializer.data)
+    result_page = paginator.paginate_queryset(
+        with_listing_data(base_queryset, fields), request
+    )
+    response = paginator.get_paginated_response(
+        serialize_products(result_page, request, fields)
+    )
+    return add_facets(
+        request, response, base_queryset.order_by().values_list("id", flat=True)
+    )
 
 
-from .models import Product, Category, ProductVariant
+@catalog_conditional
+@api_view(["GET"])
+def search_suggestions(request):
+    """اقتراحات سريعة وهو بيكتب: أسماء منتجات وبراندات وأقسام بتبدأ بالـ q."""
+    try:
+        limit = min(int(request.GET.get("limit", 5)), MAX_SUGGESTIONS)
+    except ValueError:
+        limit = 5
+    return Response(search_index.suggest(request.GET.get("q", ""), limit=max(limit, 1)))
 
 
+@catalog_conditional
 @api_view(["GET"])
 def flash_sale_products(request):
-    # جلب الـ product ids اللي فيهم خصم
-    discounted_variant_products_ids = (
-        ProductVariant.objects.filter(
-            discount__isnull=False,
-            discount__gt=0,
-            price__gt=0,
-        )
-        .annotate(
-            discount_percentage=ExpressionWrapper(
-                (Cast(F("discount"), FloatField()) / Cast(F("price"), FloatField()))
-                * 100,
-                output_field=FloatField(),
-            )
-        )
-        .filter(discount_percentage__gte=5)
-        .values_list("product_id", flat=True)
-        .distinct()
-    )
-
-    # جلب المنتجات الفريدة بناءً على الـ ids
-    discounted_products = Product.objects.filter(id__in=discounted_variant_products_ids)
-    paginator = PageNumberPagination()
+    # الترتيب متخزن على المنتج نفسه (max_discount_pct) وعليه partial index
+    fields = requested_fields(request)
+    discounted_products = with_listing_data(Product.objects.flash_sale(), fields)
+    if use_cursor_pagination(request):
+        paginator = KeysetPagination()
+    else:
+        paginator = PageNumberPagination()
     paginator.page_size = 10
     queryset = paginator.paginate_queryset(discounted_products, request)
-    serializer = ProductSerializer(queryset, many=True, context={"request": request})
-    return paginator.get_paginated_response(serializer.data)
+    return paginator.get_paginated_response(
+        serialize_products(queryset, request, fields)
+    )
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def flash_sale_swiper(request):
-    discounted_products = (
-        Product.objects.filter(
-            variants__discount__isnull=False,
-            variants__discount__gt=0,
-            variants__price__gt=0,
-        )
-        .annotate(
-            discount_percentage=ExpressionWrapper(
-                (
-                    Cast(F("variants__discount"), FloatField())
-                    / Cast(F("variants__price"), FloatField())
-                )
-                * 100,
-                output_field=FloatField(),
-            )
-        )
-        .filter(discount_percentage__gte=5)
-        .order_by("-discount_percentage")
-        .distinct()[:5]
-    )
-
-    serializer = ProductSerializer(
-        discounted_products, many=True, context={"request": request}
-    )
-    return Response(serializer.data)
+    # أعلى 5 منتجات حسب أكبر نسبة خصم في الـ variants بتاعتها
+    fields = requested_fields(request)
+    discounted_products = with_listing_data(Product.objects.flash_sale(), fields)[:5]
+    return Response(serialize_products(discounted_products, request, fields))
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def get_normal_categories(request):
     categories = Category.objects.filter(is_special=False)
     data = []
@@ -147,13 +286,18 @@ def get_normal_categories(request):
                 "image": (
                     request.build_absolute_uri(cat.image.url) if cat.image else None
                 ),
+                "srcset": srcset(
+                    cat.image, cat.image_width, request.build_absolute_uri
+                ),
             }
         )
 
     return Response(data)
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def get_special_categories(request):
     categories = Category.objects.filter(is_special=True)
     data = []
@@ -171,39 +315,48 @@ def get_special_categories(request):
                 "image": (
                     request.build_absolute_uri(cat.image.url) if cat.image else None
                 ),
+                "srcset": srcset(
+                    cat.image, cat.image_width, request.build_absolute_uri
+                ),
             }
         )
 
     return Response(data)
 
 
+@catalog_conditional
 @api_view(["GET"])
 def get_brands_by_filter(request):
-    queryset = Product.objects.all()
-
-    # Apply filters if exist
     category = request.GET.get("category")
     search = request.GET.get("search")
 
-    if category:
-        queryset = queryset.filter(category__name__iexact=category)
-
     if search:
-        lang = request.headers.get("Accept-Language", "en")
-        if lang == "ar":
-            queryset = queryset.filter(name_ar__icontains=search)
-        else:
-            queryset = queryset.filter(name__icontains=search)
+        # العد حسب نتيجة البحث مش متخزن، فده بس اللي بيعمل GROUP BY
+        queryset = Product.objects.filter(name__icontains=search)
+        if category:
+            queryset = queryset.filter(category__name__iexact=category)
+        brand_counts = (
+            queryset.values("brand").annotate(count=Count("id")).order_by("-count")
+        )
+        return Response([item["brand"] for item in brand_counts[:MAX_BRANDS]])
 
-    # Count brands
-    brand_counts = (
-        queryset.values("brand").annotate(count=Count("brand")).order_by("-count")
-    )
-    top_brands = [item["brand"] for item in brand_counts[:10]]
-    return Response(top_brands)
+    # العدد متخزن (refresh_brand_counts) فدي قراية واحدة على الـ index
+    if category:
+        brands = BrandCategoryCount.objects.filter(
+            category__name__iexact=category, product_count__gt=0
+        ).order_by("-product_count", "brand__name")
+        names = brands.values_list("brand__name", flat=True)
+    else:
+        brands = Brand.objects.filter(product_count__gt=0).order_by(
+            "-product_count", "name"
+        )
+        names = brands.values_list("name", flat=True)
+    return Response(list(names[:MAX_BRANDS]))
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def get_offer_images(request):
     queryset = OfferImage.objects.all().order_by("id")
 
@@ -212,7 +365,9 @@ def get_offer_images(request):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@catalog_conditional
 @api_view(["GET"])
+@cached_response
 def get_review_images(request):
     queryset = ReviewsImage.objects.all().order_by("id")
 